@@ -0,0 +1,124 @@
+"""
+In-memory index of the clips of every clip folder
+
+Each folder keeps its clip numbers sorted, with their sizes, so counting clips
+or finding the next clip to upload does not list and parse the whole folder.
+Clips created by this app are added as they land; changes made by anything else
+are picked up through the folder's modification time (one os.stat per lookup),
+with a full rescan at least every reconcile_interval seconds.
+"""
+
+import bisect
+import itertools
+import os
+import re
+import threading
+import time
+
+CLIP_NAME = re.compile(r"^clip_(\d+)\.mp4$")
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv'}
+
+# Every change of a folder index gets a new version
+_versions = itertools.count(1)
+
+
+class _FolderIndex:
+    __slots__ = ("numbers", "sizes", "other_videos", "mtime", "scanned_at", "version")
+
+    def __init__(self, mtime):
+        self.numbers = []
+        self.sizes = {}
+        self.other_videos = 0
+        self.mtime = mtime
+        self.scanned_at = time.monotonic()
+        self.version = next(_versions)
+
+
+class ClipInventory:
+    def __init__(self, reconcile_interval=300):
+        self.reconcile_interval = reconcile_interval
+        self.folders = {}
+        self.lock = threading.Lock()
+
+    def _folder(self, clips_dir):
+        """Index of a folder, rescanned if it changed on disk (called with self.lock held)"""
+        key = os.path.abspath(clips_dir)
+        try:
+            mtime = os.stat(key).st_mtime_ns
+        except OSError:
+            self.folders.pop(key, None)
+            return None
+
+        index = self.folders.get(key)
+        if (index is None or index.mtime != mtime
+                or time.monotonic() - index.scanned_at > self.reconcile_interval):
+            index = self._scan(key, mtime)
+            self.folders[key] = index
+        return index
+
+    @staticmethod
+    def _scan(path, mtime):
+        index = _FolderIndex(mtime)
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    match = CLIP_NAME.match(entry.name)
+                    if match and entry.is_file():
+                        number = int(match.group(1))
+                        index.numbers.append(number)
+                        index.sizes[number] = entry.stat().st_size
+                    elif os.path.splitext(entry.name.lower())[1] in VIDEO_EXTENSIONS:
+                        index.other_videos += 1
+        except OSError as e:
+            print(f"Error scanning clips in {path}: {e}")
+        index.numbers.sort()
+        return index
+
+    def count(self, clips_dir):
+        """Number of video files in the folder"""
+        with self.lock:
+            index = self._folder(clips_dir)
+            return len(index.numbers) + index.other_videos if index else 0
+
+    def clip_numbers(self, clips_dir):
+        """Sorted numbers of the clip_N.mp4 files in the folder"""
+        with self.lock:
+            index = self._folder(clips_dir)
+            return list(index.numbers) if index else []
+
+    def total_size(self, clips_dir):
+        with self.lock:
+            index = self._folder(clips_dir)
+            return sum(index.sizes.values()) if index else 0
+
+    def version(self, clips_dir):
+        """Changes whenever the clips of the folder may have changed (None if it doesn't exist)"""
+        with self.lock:
+            index = self._folder(clips_dir)
+            return index.version if index else None
+
+    def add_clips(self, clips_dir, numbers):
+        """Record clips created in the folder without rescanning it"""
+        with self.lock:
+            # A folder that isn't indexed yet is scanned on its first lookup
+            index = self.folders.get(os.path.abspath(clips_dir))
+            if not index:
+                return
+            for number in numbers:
+                path = os.path.join(clips_dir, f"clip_{number}.mp4")
+                if not os.path.exists(path):
+                    continue
+                if number not in index.sizes:
+                    bisect.insort(index.numbers, number)
+                index.sizes[number] = os.path.getsize(path)
+            index.mtime = os.stat(clips_dir).st_mtime_ns
+            index.version = next(_versions)
+
+    def forget(self, clips_dir):
+        """Drop the index of a folder (e.g. after deleting it)"""
+        with self.lock:
+            self.folders.pop(os.path.abspath(clips_dir), None)
+
+
+# Shared by the API, the scheduler and the clip creation code
+inventory = ClipInventory()
@@ -0,0 +1,144 @@
+"""
+Content-addressed clip library shared by every account
+
+A rendered clip is stored once under a hash of its source content and render
+parameters. Account clip folders only hold hard links to the stored files, so a
+source clipped for several accounts or platforms is encoded and stored once,
+while clip folders keep looking like plain clip_N.mp4 files.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file's content in bounded chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ClipStore:
+    """
+    Stored clips are shared through hard links, so the store is only used for
+    clip folders on the same filesystem (see usable_for); clips of other folders
+    are rendered as usual. Which folder holds which stored clip is recorded in
+    refs.db next to the store: deleting a folder releases its references and
+    removes the stored clips nobody else uses.
+    """
+
+    def __init__(self, store_dir="clip_store"):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        self.device = os.stat(store_dir).st_dev
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(store_dir, "refs.db"), check_same_thread=False)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS refs (
+                    folder TEXT NOT NULL,
+                    number INTEGER NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (folder, number)
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_refs_key ON refs (key)")
+
+    @staticmethod
+    def make_key(source_key, start, end, render_params):
+        """Key of a clip: source identity + [start, end) + render parameters"""
+        description = json.dumps({
+            "source": source_key,
+            "start": start,
+            "end": end,
+            "params": render_params
+        }, sort_keys=True)
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.store_dir, key[:2], f"{key}.mp4")
+
+    def has(self, key):
+        return os.path.exists(self.path_for(key))
+
+    def usable_for(self, clips_dir):
+        """Stored clips can be hard linked into clips_dir (same filesystem)"""
+        try:
+            return os.stat(clips_dir).st_dev == self.device
+        except OSError:
+            return False
+
+    def link(self, key, number, clips_dir, dest_path):
+        """
+        Expose a stored clip at dest_path (clip `number` of clips_dir) as a hard link
+        Returns:
+            bool: False if the link could not be made (the clip must be rendered)
+        """
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(self.path_for(key), dest_path)
+        except OSError as e:
+            print(f"Could not link stored clip to {dest_path}: {e}")
+            return False
+        self._reference(key, number, clips_dir)
+        return True
+
+    def add(self, key, number, clips_dir, clip_path):
+        """Hard link a freshly rendered clip into the store (the clip stays in place)"""
+        store_path = self.path_for(key)
+        os.makedirs(os.path.dirname(store_path), exist_ok=True)
+        try:
+            if not os.path.exists(store_path):
+                os.link(clip_path, store_path)
+        except OSError as e:
+            print(f"Could not add {clip_path} to the clip store: {e}")
+            return
+        self._reference(key, number, clips_dir)
+
+    def _reference(self, key, number, clips_dir):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO refs (folder, number, key) VALUES (?, ?, ?)",
+                              (os.path.abspath(clips_dir), number, key))
+
+    def split_segments(self, source_key, segments, render_params):
+        """
+        Separate the planned segments that are already stored from those that must be rendered
+        Returns:
+            tuple: (stored, missing) lists of ((number, start, end), key)
+        """
+        stored, missing = [], []
+        for segment in segments:
+            key = self.make_key(source_key, segment[1], segment[2], render_params)
+            (stored if self.has(key) else missing).append((segment, key))
+        return stored, missing
+
+    def release(self, clips_dir):
+        """
+        Drop the references of a deleted clip folder and the stored clips no other folder uses
+        Returns:
+            int: Number of stored clips removed
+        """
+        folder = os.path.abspath(clips_dir)
+        removed = 0
+        with self.lock:
+            with self.conn:
+                keys = [row[0] for row in self.conn.execute("SELECT DISTINCT key FROM refs WHERE folder = ?",
+                                                            (folder,))]
+                self.conn.execute("DELETE FROM refs WHERE folder = ?", (folder,))
+            for key in keys:
+                if self.conn.execute("SELECT 1 FROM refs WHERE key = ? LIMIT 1", (key,)).fetchone():
+                    continue
+                try:
+                    os.remove(self.path_for(key))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Error removing stored clip {key}: {e}")
+        return removed
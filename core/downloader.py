@@ -0,0 +1,209 @@
+"""
+Segmented, resumable downloader for large source videos
+
+The file is preallocated and fetched in fixed-size byte ranges by several
+connections at once. Finished ranges are recorded in a small sidecar file so an
+interrupted download resumes from where it stopped instead of from zero.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+class RateLimiter:
+    """Token bucket shared by all the connections of a download (bytes per second)"""
+
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self.tokens = bytes_per_second
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount):
+        """Take amount bytes from the bucket, sleeping if the rate is exceeded"""
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class SegmentedDownloader:
+    """
+    Download a URL into output_path using parallel byte ranges
+    Args:
+        url (str): URL of the file (the server must support Range requests,
+            otherwise a single stream download is used)
+        output_path (str): Destination file
+        connections (int): Number of parallel connections
+        segment_size (int): Size of each byte range
+        bandwidth_limit (float): Aggregate limit in Mbit/s (None or 0 = unlimited)
+        rate_limiter (RateLimiter): Shared limiter, to cap several downloads together
+        progress_callback: Called with (bytes_done, total_bytes)
+        max_retries (int): Attempts per byte range before giving up
+    """
+
+    def __init__(self, url, output_path, connections=4, segment_size=8 * 1024 * 1024,
+                 bandwidth_limit=None, rate_limiter=None, progress_callback=None, max_retries=3, timeout=30):
+        self.url = url
+        self.output_path = output_path
+        self.state_path = output_path + ".parts.json"
+        self.connections = max(1, connections)
+        self.segment_size = segment_size
+        self.limiter = rate_limiter or (RateLimiter(bandwidth_limit * 1000000 / 8) if bandwidth_limit else None)
+        self.progress_callback = progress_callback
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        self.total_size = None
+        self.completed = set()
+        self.bytes_done = 0
+
+    def get_size(self):
+        """Ask the server for the size of the file and whether it supports ranges"""
+        response = self.session.head(self.url, allow_redirects=True, timeout=self.timeout)
+        response.raise_for_status()
+        size = int(response.headers.get("Content-Length", 0)) or None
+        accepts_ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        return size, accepts_ranges
+
+    def download(self, total_size=None):
+        """
+        Download the file, resuming a previous attempt if there is one
+        Returns:
+            str: output_path
+        """
+        size, accepts_ranges = self.get_size()
+        self.total_size = total_size or size
+
+        if not self.total_size or not accepts_ranges:
+            return self._download_single()
+
+        self._load_state()
+        self._preallocate()
+
+        segments = [index for index in range(self._segment_count()) if index not in self.completed]
+        self.bytes_done = sum(self._segment_length(index) for index in self.completed)
+        self._report_progress()
+
+        with ThreadPoolExecutor(max_workers=self.connections) as pool:
+            for future in [pool.submit(self._download_segment, index) for index in segments]:
+                future.result()
+
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return self.output_path
+
+    def _segment_count(self):
+        return -(-self.total_size // self.segment_size)
+
+    def _segment_length(self, index):
+        start = index * self.segment_size
+        return min(self.segment_size, self.total_size - start)
+
+    def _load_state(self):
+        """Reuse the finished ranges of a previous attempt on the same file"""
+        self.completed = set()
+        if not (os.path.exists(self.state_path) and os.path.exists(self.output_path)):
+            return
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            if state.get("total_size") == self.total_size and state.get("segment_size") == self.segment_size:
+                self.completed = set(state.get("completed", []))
+                print(f"Resuming download of {self.output_path} ({len(self.completed)} parts already done)")
+        except (ValueError, OSError) as e:
+            print(f"Ignoring unreadable download state {self.state_path}: {e}")
+
+    def _save_state(self):
+        """Atomically record the finished ranges (called with self.lock held)"""
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({
+                "url": self.url,
+                "total_size": self.total_size,
+                "segment_size": self.segment_size,
+                "completed": sorted(self.completed)
+            }, f)
+        os.replace(temp_path, self.state_path)
+
+    def _preallocate(self):
+        """Create the destination file with its final size"""
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        mode = 'r+b' if os.path.exists(self.output_path) and self.completed else 'wb'
+        with open(self.output_path, mode) as f:
+            f.truncate(self.total_size)
+        if mode == 'wb':
+            with self.lock:
+                self._save_state()
+
+    def _download_segment(self, index):
+        """Fetch one byte range and write it in place, retrying with backoff"""
+        start = index * self.segment_size
+        end = start + self._segment_length(index) - 1
+
+        for attempt in range(self.max_retries):
+            written = 0
+            try:
+                headers = {"Range": f"bytes={start}-{end}"}
+                with self.session.get(self.url, headers=headers, stream=True, timeout=self.timeout) as response:
+                    if response.status_code != 206:
+                        raise IOError(f"Range request not honoured (HTTP {response.status_code})")
+                    with open(self.output_path, 'r+b') as f:
+                        f.seek(start)
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            if self.limiter:
+                                self.limiter.consume(len(chunk))
+                            f.write(chunk)
+                            written += len(chunk)
+                            self._add_progress(len(chunk))
+
+                if written != end - start + 1:
+                    raise IOError(f"Incomplete range {start}-{end} ({written} bytes)")
+
+                with self.lock:
+                    self.completed.add(index)
+                    self._save_state()
+                return
+            except (requests.RequestException, IOError) as e:
+                self._add_progress(-written)
+                if attempt == self.max_retries - 1:
+                    raise
+                delay = 2 ** attempt
+                print(f"Range {start}-{end} failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+
+    def _download_single(self):
+        """Plain streaming download for servers without range support"""
+        with self.session.get(self.url, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            with open(self.output_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if self.limiter:
+                        self.limiter.consume(len(chunk))
+                    f.write(chunk)
+                    self._add_progress(len(chunk))
+        return self.output_path
+
+    def _add_progress(self, amount):
+        with self.lock:
+            self.bytes_done += amount
+        self._report_progress()
+
+    def _report_progress(self):
+        if self.progress_callback:
+            self.progress_callback(self.bytes_done, self.total_size or self.bytes_done)
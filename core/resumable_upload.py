@@ -0,0 +1,75 @@
+"""
+Resumable, chunked media uploads for Google API requests
+
+upload_resumable drives an insert request built with a resumable MediaFileUpload
+one chunk at a time. When a chunk fails with a network error or a 5xx response,
+it waits (exponential backoff with jitter) and calls next_chunk() again: the
+client library first asks the server how many bytes it has, and the upload
+continues from the last acknowledged byte instead of starting over.
+
+The request only needs a next_chunk() method, so the engine can be exercised
+against a local fake upload endpoint (build the service with
+client_options={"api_endpoint": "http://127.0.0.1:<port>"}) or a stub request.
+"""
+
+import http.client
+import random
+import time
+
+import httplib2
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
+
+# Chunks must be a multiple of 256 KiB
+CHUNK_ALIGNMENT = 256 * 1024
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+RETRIABLE_STATUS_CODES = {500, 502, 503, 504}
+RETRIABLE_EXCEPTIONS = (httplib2.HttpLib2Error, http.client.HTTPException, OSError)
+MAX_BACKOFF = 64
+
+
+def chunked_media(file_path, chunk_size=DEFAULT_CHUNK_SIZE, mimetype="video/mp4"):
+    """Resumable media body sent in chunk_size pieces (rounded to the 256 KiB the API requires)"""
+    chunk_size = max(CHUNK_ALIGNMENT, chunk_size // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT)
+    return MediaFileUpload(file_path, mimetype=mimetype, chunksize=chunk_size, resumable=True)
+
+
+def upload_resumable(request, max_retries=3, progress_callback=None, sleep=time.sleep):
+    """
+    Send a resumable request chunk by chunk until the server returns the created resource
+
+    Args:
+        request: HttpRequest whose media body is resumable (or anything with next_chunk())
+        max_retries: Consecutive failed attempts allowed before giving up; the count
+            starts again after every chunk that goes through
+        progress_callback: Called with (bytes_sent, total_bytes) after each chunk
+        sleep: Used to wait between retries
+    Returns:
+        dict: API response of the finished upload
+    Raises:
+        HttpError: non-retriable response, or the last error once retries are exhausted
+    """
+    response = None
+    failures = 0
+    while response is None:
+        try:
+            status, response = request.next_chunk()
+            failures = 0
+            if status and progress_callback:
+                progress_callback(status.resumable_progress, status.total_size)
+            continue
+        except HttpError as e:
+            if e.resp.status not in RETRIABLE_STATUS_CODES:
+                raise
+            error = e
+        except RETRIABLE_EXCEPTIONS as e:
+            error = e
+
+        failures += 1
+        if failures > max_retries:
+            raise error
+        delay = min(MAX_BACKOFF, 2 ** (failures - 1)) * random.uniform(0.5, 1.0)
+        print(f"Upload chunk failed ({type(error).__name__}: {error}), retry {failures}/{max_retries} in {delay:.1f}s")
+        sleep(delay)
+
+    return response
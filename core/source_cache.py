@@ -0,0 +1,130 @@
+"""
+Shared cache of downloaded source videos
+
+Sources are stored once, keyed by YouTube video ID and the selected streams,
+so repeated ingests of the same URL (from any account) skip the download and
+go straight to clipping. The cache is bounded in size and evicts the least
+recently used sources first. A clip job pins the source it gets or puts until
+it is done with it (release), and pinned sources are never evicted.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+
+
+class SourceCache:
+    def __init__(self, cache_dir="source_cache", max_size_mb=2048):
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.max_size_mb = max_size_mb
+        self.lock = threading.Lock()
+        self.pins = Counter()  # key -> clip jobs still using the source
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    @staticmethod
+    def make_key(video_id, video_itag, audio_itag, window=None):
+        """Cache key for a source: video ID + selected streams (+ time window if only a range was fetched)"""
+        key = f"{video_id}_v{video_itag}_a{audio_itag}"
+        if window:
+            key += f"_{window[0]}-{window[1]}"
+        return key
+
+    def _load_index(self):
+        """Load the index, dropping entries whose file no longer exists"""
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r') as f:
+                    index = json.load(f)
+                return {key: entry for key, entry in index.items()
+                        if os.path.exists(os.path.join(self.cache_dir, entry["file"]))}
+        except Exception as e:
+            print(f"Error loading source cache index: {e}")
+        return {}
+
+    def _save_index(self):
+        """Write the index atomically (called with self.lock held)"""
+        temp_file = self.index_file + ".tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(temp_file, self.index_file)
+
+    def get(self, key, pin=False):
+        """
+        Return the cached file for key (marking it as recently used) or None
+        With pin=True the source is kept until release(key) is called.
+        """
+        with self.lock:
+            entry = self.index.get(key)
+            if not entry:
+                return None
+            path = os.path.join(self.cache_dir, entry["file"])
+            if not os.path.exists(path):
+                del self.index[key]
+                self._save_index()
+                return None
+            entry["last_used"] = time.time()
+            if pin:
+                self.pins[key] += 1
+            self._save_index()
+            return path
+
+    def put(self, key, file_path, pin=False):
+        """
+        Move a downloaded source into the cache
+        With pin=True the source is kept until release(key) is called.
+        Returns:
+            str: The path of the file inside the cache
+        """
+        filename = f"{key}{os.path.splitext(file_path)[1]}"
+        cached_path = os.path.join(self.cache_dir, filename)
+        shutil.move(file_path, cached_path)
+
+        with self.lock:
+            self.index[key] = {
+                "file": filename,
+                "size": os.path.getsize(cached_path),
+                "last_used": time.time()
+            }
+            if pin:
+                self.pins[key] += 1
+            self._evict(keep=key)
+            self._save_index()
+        return cached_path
+
+    def release(self, key):
+        """Unpin a source taken with pin=True; once unused it can be evicted again"""
+        with self.lock:
+            if self.pins[key] > 1:
+                self.pins[key] -= 1
+                return
+            del self.pins[key]
+            # Sources put while others were pinned may have left the cache over its size
+            self._evict()
+            self._save_index()
+
+    def total_size(self):
+        return sum(entry["size"] for entry in self.index.values())
+
+    def _evict(self, keep=None):
+        """Remove least recently used sources until the cache fits (called with self.lock held)"""
+        max_bytes = self.max_size_mb * 1024 * 1024
+        total = self.total_size()
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= max_bytes:
+                break
+            if key == keep or self.pins[key]:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except OSError as e:
+                # Probably in use by a running clip job, try again on the next eviction
+                print(f"Could not evict cached source {entry['file']}: {e}")
+                continue
+            total -= entry["size"]
+            del self.index[key]
+            print(f"Evicted cached source {entry['file']}")
@@ -9,7 +9,17 @@ import os
 import re
 import json
 import shutil
-from moviepy.editor import VideoFileClip
+
+try:
+    from core.video_processing import probe_video, plan_clip_segments, render_clips
+    from core.clip_store import file_sha256
+    from core.clip_inventory import inventory
+    from core.upload_ledger import ledger_for
+except ImportError:
+    from video_processing import probe_video, plan_clip_segments, render_clips
+    from clip_store import file_sha256
+    from clip_inventory import inventory
+    from upload_ledger import ledger_for
 
 # PIL compatibility fix for newer versions
 try:
@@ -50,6 +60,7 @@ class TikTokAutomation:
         self.account_name = account_name
         self.clips_folder = acc_data.get("clip_folder")
         self.acc_data = acc_data
+        self.clip_store = None
 
     @staticmethod
     def sanitize_filename(filename):
@@ -77,16 +88,19 @@ class TikTokAutomation:
         print(f"Video file copied to {self.final_output_path}")
         return True
 
-    def create_clips(self, clip_duration=15):
-        """Create clips from the processed video file."""
+    def create_clips(self, clip_duration=15, stream_copy=True):
+        """
+        Create clips from the processed video file.
+        If stream_copy is True the clips are cut without re-encoding (keyframe
+        aligned); re-encoding is only used when the source can't be remuxed.
+        """
         if not self.final_output_path or not os.path.exists(self.final_output_path):
             print("No video file to process. Please process a video file first.")
             return False
 
         try:
-            # Load the video
-            video = VideoFileClip(self.final_output_path)
-            total_duration = int(video.duration)
+            # Read the video duration from the container
+            total_duration = int(probe_video(self.final_output_path)["duration"])
             
             # Create clips directory if it doesn't exist
             clips_dir = os.path.join(self.output_path, "clips")
@@ -94,32 +108,18 @@ class TikTokAutomation:
                 os.makedirs(clips_dir)
             
             # Count existing clips to continue numbering
-            existing_clips = [f for f in os.listdir(clips_dir) if f.startswith("clip_")]
-            next_clip_number = len(existing_clips) + 1
+            next_clip_number = inventory.count(clips_dir) + 1
             
-            clips_created = 0
+            # Plan full clips only (the remaining partial clip is skipped)
+            segments = plan_clip_segments(total_duration, clip_duration, skip_first=False,
+                                          number_offset=next_clip_number)
             
-            # Create clips
-            for start in range(0, total_duration, clip_duration):
-                end = min(start + clip_duration, total_duration)
-                
-                # Skip if the remaining time is less than the desired clip duration
-                if end - start < clip_duration:
-                    break
-                
-                clip = video.subclip(start, end)
-                clip_path = os.path.join(clips_dir, f"clip_{next_clip_number}.mp4")
-                
-                # Write the clip
-                clip.write_videofile(clip_path, codec='libx264', audio_codec='aac')
-                print(f"Created clip: {clip_path}")
-                
-                clips_created += 1
-                next_clip_number += 1
+            # Clips already rendered from the same file (for any account) are linked from the clip store
+            source_key = file_sha256(self.final_output_path) if self.clip_store else None
+            render_clips(self.final_output_path, clips_dir, segments, mobile_format=False, stream_copy=stream_copy,
+                         clip_store=self.clip_store, source_key=source_key)
             
-            # Clean up
-            video.close()
-            print(f"Successfully created {clips_created} clips of {clip_duration} seconds each.")
+            print(f"Successfully created {len(segments)} clips of {clip_duration} seconds each.")
             return True
             
         except Exception as e:
@@ -127,45 +127,61 @@ class TikTokAutomation:
             return False
 
     def upload_and_log_short(self, use_real_api=None):
-        """Upload the next available clip to TikTok and log it."""
+        """
+        Upload the next available clip to TikTok and log it.
+        Returns:
+            bool: True if the clip was uploaded, False if the upload failed,
+                None if there was no clip to upload
+        """
         # Auto-detect if real API should be used
         if use_real_api is None:
             use_real_api = REAL_API_AVAILABLE and self._has_real_api_config()
         
-        log_file = f"tiktok_automation/logs/{self.account_name}_uploaded_videos.json"
-        part_number = self.get_next_part_number(log_file)
-        
-        file_path = f"{self.clips_folder}/clips/clip_{part_number}.mp4"
-        
-        if not os.path.exists(file_path):
-            print(f"❌ No clip found at {file_path}")
-            return False
-        
-        title = self.acc_data.get("title", "TikTok Video") + " pt: " + str(part_number)
-        description = self.acc_data.get("description", "") + " pt: " + str(part_number)
-        tags = self.acc_data.get("tags", "")
-        
-        # Add hashtags to description if tags are provided
-        if tags:
-            hashtags = " ".join([f"#{tag.strip()}" for tag in tags.split(",") if tag.strip()])
-            description = f"{description} {hashtags}"
-        
-        if use_real_api:
-            # Real TikTok API upload
-            success = self._real_tiktok_upload(file_path, title, description)
-        else:
-            # Simulated upload
-            success = self._simulate_tiktok_upload(file_path, title, description)
+        ledger = self.upload_ledger()
+
+        # Next pending clip of the account's upload queue (reserved until marked uploaded or failed)
+        clip_filename, part_number = ledger.claim_next(os.path.join(self.clips_folder, "clips"))
+        if not clip_filename:
+            print(f"❌ No clips available to upload for account {self.account_name}")
+            return None
+
+        try:
+            file_path = f"{self.clips_folder}/clips/{clip_filename}"
+
+            title = (self.acc_data.get("title") or "TikTok Video") + " pt: " + str(part_number)
+            description = (self.acc_data.get("description") or "") + " pt: " + str(part_number)
+            tags = self.acc_data.get("tags") or ""
+
+            # Add hashtags to description if tags are provided
+            if tags:
+                hashtags = " ".join([f"#{tag.strip()}" for tag in tags.split(",") if tag.strip()])
+                description = f"{description} {hashtags}"
+
+            if use_real_api:
+                # Real TikTok API upload
+                success = self._real_tiktok_upload(file_path, title, description)
+            else:
+                # Simulated upload
+                success = self._simulate_tiktok_upload(file_path, title, description)
+        except Exception as e:
+            # Release the clip so it is retried
+            ledger.fail(part_number, str(e))
+            raise
         
         if success:
-            # Log the video
-            self.log_video(log_file, title)
+            # Log the video and mark the clip as uploaded
+            ledger.complete(part_number, title, self.account_name)
             print(f"🎉 TikTok clip {part_number} uploaded successfully!")
             return True
         else:
+            ledger.fail(part_number, "Upload failed")
             print(f"❌ Failed to upload TikTok clip {part_number}")
             return False
     
+    def upload_ledger(self):
+        """Upload ledger and queue of the account"""
+        return ledger_for(f"tiktok_automation/logs/{self.account_name}_uploaded_videos.json")
+
     def _real_tiktok_upload(self, file_path, title, description):
         """Upload video using real TikTok API"""
         if not REAL_API_AVAILABLE:
@@ -229,37 +245,6 @@ class TikTokAutomation:
         print(f"✅ TikTok upload simulated successfully!")
         return True
 
-    @staticmethod
-    def get_next_part_number(log_file):
-        """Get the next part number for video uploads."""
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                data = json.load(f)
-                return len(data.get("videos", [])) + 1
-        else:
-            os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        return 1
-
-    def log_video(self, log_file, title):
-        """Log uploaded video information."""
-        # Load existing data
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                data = json.load(f)
-        else:
-            data = {"videos": []}
-        
-        # Add new video
-        data["videos"].append({
-            "title": title,
-            "upload_date": datetime.datetime.now().isoformat(),
-            "account": self.account_name
-        })
-        
-        # Save back to file
-        with open(log_file, 'w') as f:
-            json.dump(data, f, indent=4)
-
     @staticmethod
     def authenticate_tiktok_account(account_name, use_real_api=None):
         """
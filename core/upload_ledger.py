@@ -0,0 +1,281 @@
+"""
+Append-only ledger of the uploads of an account
+
+Each account gets a small SQLite database next to its old
+{account}_uploaded_videos.json log. Recording an upload is one INSERT instead
+of rewriting the whole JSON file, so the cost of an upload does not grow with
+the account's history.
+
+The same database holds the account's upload queue, shared by YouTube and
+TikTok: one row per clip_N.mp4, in clip number order, with its state
+(pending, in_flight, uploaded or failed). Whenever the clip inventory reports
+that the folder changed, every clip on disk that is not queued yet is added as
+pending (gaps in the numbering included), and the next clip is the first
+pending row of an index, so picking it is O(log n).
+
+A clip is marked in_flight before its upload starts and uploaded in the same
+transaction that appends it to the ledger. A failed upload goes back to
+pending and is retried after an exponential backoff. Clips found in_flight
+when the ledger is opened again were interrupted by a crash and may or may not
+have reached the platform: they are held as failed, listed by queue_state()
+(exposed by the API), until requeue() is called, so they are neither uploaded
+twice nor skipped without notice. Queued clips whose file is gone are dropped
+from the queue and queued again if the file comes back.
+
+The first time a ledger is opened, the entries of the JSON log (if any) are
+imported; the JSON file itself is left untouched.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+try:
+    from core.clip_inventory import CLIP_NAME, inventory
+except ImportError:
+    from clip_inventory import CLIP_NAME, inventory
+
+QUEUE_STATES = ("pending", "in_flight", "uploaded", "failed")
+# Wait before retrying a failed upload: RETRY_DELAY * 2^(attempts - 1), at most MAX_RETRY_DELAY (seconds)
+RETRY_DELAY = 300
+MAX_RETRY_DELAY = 6 * 3600
+
+
+class UploadLedger:
+    def __init__(self, db_path, legacy_log=None):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.synced = {}  # clips folder -> inventory version already queued
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._create_schema()
+        if legacy_log:
+            self._migrate(legacy_log)
+        self._seed_queue()
+        self._hold_interrupted()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS uploads (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT,
+                    clip_file TEXT,
+                    account TEXT,
+                    uploaded_at TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_clip ON uploads (clip_file)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS queue (
+                    clip_number INTEGER PRIMARY KEY,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    retry_at REAL NOT NULL DEFAULT 0,
+                    updated_at TEXT
+                )
+            """)
+            columns = [row["name"] for row in self.conn.execute("PRAGMA table_info(queue)")]
+            if "retry_at" not in columns:
+                self.conn.execute("ALTER TABLE queue ADD COLUMN retry_at REAL NOT NULL DEFAULT 0")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_state ON queue (state, clip_number)")
+
+    def _migrate(self, legacy_log):
+        """Import the entries of an {account}_uploaded_videos.json log (only once)"""
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone():
+            return
+        entries = []
+        if os.path.exists(legacy_log):
+            try:
+                with open(legacy_log, 'r') as f:
+                    entries = json.load(f).get("videos", [])
+            except (OSError, ValueError) as e:
+                print(f"Error reading upload log {legacy_log}: {e}")
+                return
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO uploads (title, clip_file, account, uploaded_at) VALUES (?, ?, ?, ?)",
+                [(entry.get("title"), entry.get("clip_file"), entry.get("account"),
+                  entry.get("upload_time") or entry.get("upload_date") or "")
+                 for entry in entries]
+            )
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_from', ?)", (legacy_log,))
+        if entries:
+            print(f"Imported {len(entries)} uploads from {legacy_log}")
+
+    def _seed_queue(self):
+        """
+        Mark the clips already in the ledger as uploaded (only once)
+        The other clips on disk are queued as pending by the first _sync.
+        """
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'queue_seeded'").fetchone():
+            return
+        numbers = set()
+        for row in self.conn.execute("SELECT clip_file FROM uploads WHERE clip_file IS NOT NULL"):
+            number = _clip_number(row["clip_file"])
+            if number is not None:
+                numbers.add(number)
+        if not numbers:
+            # Old TikTok logs don't name the clip: part N was always clip_N.mp4
+            numbers = set(range(1, self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM uploads").fetchone()[0] + 1))
+
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO queue (clip_number, state, updated_at) VALUES (?, 'uploaded', ?)",
+                [(number, now) for number in sorted(numbers)]
+            )
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('queue_seeded', ?)", (now,))
+
+    def _hold_interrupted(self):
+        """Uploads that were running when the process stopped may or may not have gone through"""
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE queue SET state = 'failed', error = 'Interrupted while uploading', updated_at = ? "
+                "WHERE state = 'in_flight'",
+                (datetime.now().isoformat(),)
+            )
+        if cursor.rowcount:
+            print(f"{cursor.rowcount} interrupted uploads held in {self.db_path}; check the account and requeue them")
+
+    def _sync(self, clips_dir):
+        """Queue the clips on disk that aren't queued yet (called with self.lock held)"""
+        key = os.path.abspath(clips_dir)
+        version = inventory.version(clips_dir)
+        if version is None or self.synced.get(key) == version:
+            return
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO queue (clip_number, updated_at) VALUES (?, ?)",
+                [(number, now) for number in inventory.clip_numbers(clips_dir)]
+            )
+        self.synced[key] = version
+
+    def _set_state(self, clip_number, state, error=None, attempts=0, retry_at=0):
+        self.conn.execute(
+            "UPDATE queue SET state = ?, error = ?, attempts = attempts + ?, retry_at = ?, updated_at = ? "
+            "WHERE clip_number = ?",
+            (state, error, attempts, retry_at, datetime.now().isoformat(), clip_number)
+        )
+
+    def claim_next(self, clips_dir):
+        """
+        Take the first pending clip of the folder and mark it in_flight
+        Returns:
+            tuple: (filename, number) or (None, None) when nothing is left to upload
+        """
+        with self.lock:
+            self._sync(clips_dir)
+            while True:
+                # First pending clip in number order (those waiting for a retry are stepped over)
+                row = self.conn.execute(
+                    "SELECT clip_number FROM queue WHERE state = 'pending' AND retry_at <= ? "
+                    "ORDER BY clip_number LIMIT 1",
+                    (time.time(),)
+                ).fetchone()
+                if row is None:
+                    return None, None
+                number = row["clip_number"]
+                filename = f"clip_{number}.mp4"
+                with self.conn:
+                    if os.path.exists(os.path.join(clips_dir, filename)):
+                        self._set_state(number, "in_flight")
+                        return filename, number
+                    # Deleted clip: queued again by _sync if it comes back (the folder changes)
+                    self.conn.execute("DELETE FROM queue WHERE clip_number = ?", (number,))
+
+    def complete(self, clip_number, title, account=None):
+        """
+        Mark a claimed clip as uploaded and append it to the ledger (one transaction)
+        Returns:
+            int: ID of the ledger entry
+        """
+        with self.lock, self.conn:
+            self._set_state(clip_number, "uploaded")
+            cursor = self.conn.execute(
+                "INSERT INTO uploads (title, clip_file, account, uploaded_at) VALUES (?, ?, ?, ?)",
+                (title, f"clip_{clip_number}.mp4", account, datetime.now().isoformat())
+            )
+            return cursor.lastrowid
+
+    def fail(self, clip_number, error=None):
+        """Release a claimed clip: it goes back to pending and is retried after a backoff"""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT attempts FROM queue WHERE clip_number = ?", (clip_number,)).fetchone()
+            attempts = (row["attempts"] if row else 0) + 1
+            delay = min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (attempts - 1))
+            self._set_state(clip_number, "pending", error=error, attempts=1, retry_at=time.time() + delay)
+
+    def requeue(self, clip_number):
+        """
+        Put a held (interrupted) clip back in the queue
+        Returns:
+            bool: False if the clip wasn't held
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE queue SET state = 'pending', attempts = 0, error = NULL, retry_at = 0, updated_at = ? "
+                "WHERE clip_number = ? AND state = 'failed'",
+                (datetime.now().isoformat(), clip_number)
+            )
+            return cursor.rowcount > 0
+
+    def queue_state(self, recent=20):
+        """
+        Overview of the queue for the API
+        Returns:
+            dict: clips in each state, held and retrying clips, and the most recent uploads
+        """
+        with self.lock:
+            counts = dict.fromkeys(QUEUE_STATES, 0)
+            counts.update({row["state"]: row["total"] for row in self.conn.execute(
+                "SELECT state, COUNT(*) AS total FROM queue GROUP BY state")})
+            problems = [dict(row) for row in self.conn.execute(
+                "SELECT clip_number, state, attempts, error, retry_at, updated_at FROM queue "
+                "WHERE state = 'failed' OR (state = 'pending' AND attempts > 0) ORDER BY clip_number")]
+            uploads = [dict(row) for row in self.conn.execute(
+                "SELECT * FROM uploads ORDER BY id DESC LIMIT ?", (recent,))]
+        return {
+            "counts": counts,
+            "held": [clip for clip in problems if clip["state"] == "failed"],
+            "retrying": [clip for clip in problems if clip["state"] == "pending"],
+            "recent_uploads": uploads
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def _clip_number(clip_file):
+    match = CLIP_NAME.match(clip_file or "")
+    return int(match.group(1)) if match else None
+
+
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+
+
+def ledger_for(log_file):
+    """
+    Ledger that replaces the JSON log at log_file ({account}_uploaded_videos.json
+    becomes {account}_uploaded_videos.db), opened once per process
+    """
+    db_path = os.path.abspath(os.path.splitext(log_file)[0] + ".db")
+    with _ledgers_lock:
+        ledger = _ledgers.get(db_path)
+        if ledger is None:
+            ledger = UploadLedger(db_path, legacy_log=log_file)
+            _ledgers[db_path] = ledger
+        return ledger
@@ -0,0 +1,668 @@
+"""
+Video processing helpers built directly on top of the ffmpeg binary
+
+MoviePy decodes every frame into Python (NumPy/PIL) before writing it back out.
+The helpers in this module hand that work to ffmpeg itself: stream copies when
+the frames are unchanged and native filter graphs when they are transformed.
+"""
+
+import multiprocessing
+import os
+import queue
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    from core.clip_inventory import inventory
+except ImportError:
+    from clip_inventory import inventory
+
+# Target dimensions for mobile (9:16) - YouTube Shorts optimized
+MOBILE_SIZE = (1080, 1920)
+# Tolerance (seconds) of the segment muxer when matching clip boundaries to keyframes:
+# under half a frame at 60 fps, so only the keyframe forced on the boundary qualifies
+SEGMENT_TIME_DELTA = 0.005
+
+
+def get_ffmpeg_binary():
+    """Return the ffmpeg executable used by moviepy (falls back to imageio-ffmpeg)"""
+    try:
+        from moviepy.config import get_setting
+        return get_setting("FFMPEG_BINARY")
+    except Exception:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def run_ffmpeg(args, on_progress=None):
+    """
+    Run ffmpeg with the given arguments
+    If on_progress is given, it is called with every progress report of ffmpeg
+    (a dict with 'frame', 'fps', 'out_time_us', 'speed', 'progress', ...).
+    Raises subprocess.CalledProcessError (with ffmpeg's stderr) if it fails
+    """
+    cmd = [get_ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error"]
+    if on_progress is None:
+        return subprocess.run(cmd + list(args), check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    # Progress reports go to stdout as blocks of key=value lines ending with progress=...
+    cmd += ["-nostats", "-progress", "pipe:1"] + list(args)
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file, text=True)
+        report = {}
+        for line in process.stdout:
+            key, _, value = line.strip().partition("=")
+            report[key] = value
+            if key == "progress":
+                on_progress(report)
+                report = {}
+        process.wait()
+        if process.returncode != 0:
+            stderr_file.seek(0)
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr_file.read())
+    return subprocess.CompletedProcess(cmd, process.returncode)
+
+
+def probe_video(path):
+    """
+    Read the stream information of a video file without decoding it
+    Returns:
+        dict: ffmpeg infos as parsed by moviepy ('duration', 'video_size', 'video_fps', ...)
+    """
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+    return ffmpeg_parse_infos(path)
+
+
+def plan_clip_window(total_duration, clip_duration, start_time=None, end_time=None):
+    """
+    Plan the part of a video that create_clips will actually use
+    By default the first segment is skipped (as in plan_clip_segments); the
+    window ends after the last full clip, so the trailing partial clip is never
+    fetched either.
+    Args:
+        start_time (float): Start of the wanted range in seconds (e.g. to skip an intro)
+        end_time (float): End of the wanted range in seconds
+    Returns:
+        tuple: (start, end) in seconds, or None if not even one clip fits
+    """
+    window_start = clip_duration if start_time is None else start_time
+    window_end = int(total_duration) if end_time is None else min(end_time, int(total_duration))
+
+    clip_count = int((window_end - window_start) // clip_duration)
+    if clip_count <= 0:
+        return None
+    return window_start, window_start + clip_count * clip_duration
+
+
+def plan_clip_segments(total_duration, clip_duration, skip_first=True, number_offset=0):
+    """
+    Plan the clips that will be cut out of a video
+    Only full clips are planned: the trailing partial clip is skipped.
+    Args:
+        total_duration (float): Duration of the source video in seconds
+        clip_duration (int): Duration of each clip in seconds
+        skip_first (bool): If True, the first segment of the video is not used
+        number_offset (int): Added to start // clip_duration to get the clip number
+    Returns:
+        list: (clip_number, start, end) tuples in order
+    """
+    total_duration = int(total_duration)
+    first_start = clip_duration if skip_first else 0
+
+    segments = []
+    for start in range(first_start, total_duration, clip_duration):
+        end = min(start + clip_duration, total_duration)
+        if end - start < clip_duration:
+            break
+        segments.append((start // clip_duration + number_offset, start, end))
+    return segments
+
+
+def mux_video_audio(video_path, audio_path, output_path):
+    """
+    Combine a video-only and an audio-only file into one mp4 without re-encoding
+    If the audio codec can't be stored in mp4 as is, only the audio is
+    converted to AAC; the video stream is always copied.
+    """
+    base_args = [
+        "-i", video_path, "-i", audio_path,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-c:v", "copy",
+    ]
+    try:
+        run_ffmpeg(base_args + ["-c:a", "copy", "-movflags", "+faststart", output_path])
+    except subprocess.CalledProcessError as e:
+        print(f"Audio stream can't be copied ({e.stderr.decode(errors='ignore').strip()}), converting it to AAC")
+        run_ffmpeg(base_args + ["-c:a", "aac", "-movflags", "+faststart", output_path])
+
+
+def fetch_remote_window(video_url, audio_url, start, end, output_path):
+    """
+    Download only [start, end) of remote video/audio streams and mux them into one mp4
+    ffmpeg seeks inside the remote files through the container index (the sidx
+    segment index of DASH streams) and requests just the byte ranges that cover
+    the window; nothing is re-encoded.
+    """
+    http_options = ["-reconnect", "1", "-reconnect_delay_max", "10"]
+    try:
+        run_ffmpeg(
+            http_options + ["-ss", str(start), "-i", video_url] +
+            http_options + ["-ss", str(start), "-i", audio_url] + [
+                "-t", str(end - start),
+                "-map", "0:v:0", "-map", "1:a:0",
+                "-c", "copy",
+                "-movflags", "+faststart",
+                output_path,
+            ])
+    except Exception:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+
+
+def clip_path(clips_dir, number):
+    """Path of clip number N inside a clips folder"""
+    return os.path.join(clips_dir, f"clip_{number}.mp4")
+
+
+def unlink_existing(path):
+    """
+    Remove a file about to be rendered again
+    An existing clip may be a hard link shared with the clip store and other
+    accounts: ffmpeg would overwrite that shared file in place, so the name is
+    unlinked first and the new clip gets its own file.
+    """
+    if os.path.lexists(path):
+        os.remove(path)
+
+
+def stream_copy_clip(source_path, start, end, output_path):
+    """
+    Cut [start, end) out of source_path without re-encoding
+    The input is seeked before decoding, so the clip starts on the keyframe at
+    or right before `start`.
+    """
+    unlink_existing(output_path)
+    try:
+        run_ffmpeg([
+            "-ss", str(start),
+            "-i", source_path,
+            "-t", str(end - start),
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            "-movflags", "+faststart",
+            output_path,
+        ])
+    except Exception:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+
+
+def stream_copy_clips(source_path, clips_dir, segments, progress_callback=None):
+    """
+    Create clip_N.mp4 files by remuxing the planned segments of source_path
+    Fails (subprocess.CalledProcessError / OSError) if the source streams cannot
+    be copied into an mp4 container, so callers can fall back to re-encoding.
+    Returns:
+        list: Paths of the created clips
+    """
+    os.makedirs(clips_dir, exist_ok=True)
+    tracker = RenderProgress(clips_dir, segments, progress_callback) if progress_callback else None
+
+    created = []
+    for number, start, end in segments:
+        path = clip_path(clips_dir, number)
+        stream_copy_clip(source_path, start, end, path)
+        print(f"Created clip (stream copy): {path}")
+        created.append(path)
+        if tracker:
+            tracker.clip_copied()
+    if tracker:
+        tracker.report(force=True)
+    return created
+
+
+def mobile_crop_box(width, height, crop_position='center', target_size=MOBILE_SIZE):
+    """
+    Compute the region of a width x height frame kept by the 9:16 mobile crop
+    Args:
+        crop_position: 'center', 'top', 'bottom', 'left' or 'right'. Vertical
+            center crops are biased 5% upwards for a better composition.
+    Returns:
+        tuple: (x1, y1, x2, y2)
+    """
+    target_width, target_height = target_size
+    target_ratio = target_height / target_width
+    current_ratio = height / width
+
+    x1, y1, x2, y2 = 0, 0, width, height
+
+    if current_ratio < target_ratio:
+        # Wider than the mobile format - crop horizontally
+        new_width = int(height / target_ratio)
+
+        if crop_position == 'left':
+            x1 = 0
+        elif crop_position == 'right':
+            x1 = width - new_width
+        else:  # center
+            x1 = int(width / 2 - new_width / 2)
+
+        x1 = max(0, x1)
+        x2 = min(width, x1 + new_width)
+
+    elif current_ratio > target_ratio:
+        # Taller than the mobile format - crop vertically
+        new_height = int(width * target_ratio)
+
+        if crop_position == 'top':
+            y1 = 0
+        elif crop_position == 'bottom':
+            y1 = height - new_height
+        else:  # center with slight upward bias
+            y_offset = height * 0.05  # 5% upward for better composition
+            y1 = int(height / 2 - new_height / 2 - y_offset)
+
+        y1 = max(0, y1)
+        y2 = min(height, y1 + new_height)
+
+    return x1, y1, x2, y2
+
+
+def get_frame_size(infos):
+    """Displayed (width, height) of a probed video, taking rotation metadata into account"""
+    width, height = infos["video_size"]
+    if infos.get("video_rotation", 0) in (90, 270):
+        width, height = height, width
+    return width, height
+
+
+def mobile_filter_graph(width, height, crop_position='center', target_size=MOBILE_SIZE):
+    """
+    Build the ffmpeg filter graph equivalent to the mobile conversion
+    The crop and the high quality (lanczos) scale to the mobile size run
+    natively inside ffmpeg instead of per frame in Python.
+    """
+    x1, y1, x2, y2 = mobile_crop_box(width, height, crop_position, target_size)
+    target_width, target_height = target_size
+
+    filters = []
+    if (x1, y1, x2, y2) != (0, 0, width, height):
+        filters.append(f"crop={x2 - x1}:{y2 - y1}:{x1}:{y1}")
+    filters.append(f"scale={target_width}:{target_height}:flags=lanczos")
+    filters.append("setsar=1")
+    return ",".join(filters)
+
+
+def get_worker_count(segment_count, parallel_processing=True):
+    """
+    Number of clip encoder processes to use
+    Bounded by the number of cores and by the number of clips to render.
+    """
+    if not parallel_processing:
+        return 1
+    return max(1, min(os.cpu_count() or 1, segment_count))
+
+
+def split_into_runs(segments, run_count):
+    """
+    Split planned segments into at most run_count runs of consecutive clips
+    A run covers one contiguous stretch of the source with consecutive clip
+    numbers, so it can be rendered with a single sequential decode.
+    """
+    runs = []
+    for segment in segments:
+        if runs:
+            last_number, _, last_end = runs[-1][-1]
+            if segment[0] == last_number + 1 and segment[1] == last_end:
+                runs[-1].append(segment)
+                continue
+        runs.append([segment])
+
+    # Cut the runs into even pieces so the work spreads over run_count workers
+    size = max(1, -(-len(segments) // max(1, run_count)))
+    return [run[i:i + size] for run in runs for i in range(0, len(run), size)]
+
+
+class RenderProgress:
+    """
+    Aggregates the progress reports of every ffmpeg process of a render
+    Reports are fed through put((run_index, report)), so the same object works
+    inline and, through a manager queue, from worker processes. callback is called
+    (at most every report_interval seconds) with a dict of:
+    frames, fps (frames encoded per second of wall time), clips_done, clip_count,
+    bytes_written, elapsed, eta (seconds, from measured throughput) and fraction.
+    """
+
+    def __init__(self, clips_dir, segments, callback, report_interval=1.0):
+        self.paths = [clip_path(clips_dir, number) for number, _, _ in segments]
+        self.clip_count = len(segments)
+        self.clip_duration = segments[0][2] - segments[0][1] if segments else 0
+        self.total_seconds = sum(end - start for _, start, end in segments)
+        self.callback = callback
+        self.report_interval = report_interval
+        self.started = time.monotonic()
+        self.last_report = 0
+        self.runs = {}
+        self.copied_clips = 0
+
+    def put(self, item):
+        """Record the latest ffmpeg report of one run"""
+        run_index, run_length, report = item
+        try:
+            frames = int(report.get("frame", 0))
+        except ValueError:
+            frames = 0
+        out_time = report.get("out_time_us") or report.get("out_time_ms") or "0"
+        seconds = int(out_time) / 1000000 if out_time.lstrip("-").isdigit() else 0
+        if report.get("progress") == "end":
+            seconds = run_length * self.clip_duration
+        self.runs[run_index] = (frames, max(0, seconds), run_length)
+        self.report()
+
+    def clip_copied(self):
+        """Record a clip created without encoding"""
+        self.copied_clips += 1
+        self.report()
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        frames = sum(frames for frames, _, _ in self.runs.values())
+        seconds = sum(seconds for _, seconds, _ in self.runs.values())
+        clips_done = self.copied_clips + sum(
+            min(run_length, int(seconds // self.clip_duration)) if self.clip_duration else 0
+            for _, seconds, run_length in self.runs.values()
+        )
+        if self.copied_clips:
+            seconds += self.copied_clips * self.clip_duration
+        fraction = min(1.0, seconds / self.total_seconds) if self.total_seconds else 1.0
+        eta = elapsed * (1 - fraction) / fraction if fraction > 0 else None
+        return {
+            "frames": frames,
+            "fps": round(frames / elapsed, 1) if elapsed > 0 else 0,
+            "clips_done": clips_done,
+            "clip_count": self.clip_count,
+            "bytes_written": sum(os.path.getsize(path) for path in self.paths if os.path.exists(path)),
+            "elapsed": round(elapsed, 1),
+            "eta": round(eta, 1) if eta is not None else None,
+            "fraction": round(fraction, 4)
+        }
+
+    def report(self, force=False):
+        now = time.monotonic()
+        if force or now - self.last_report >= self.report_interval:
+            self.last_report = now
+            self.callback(self.stats())
+
+
+def _encode_run(source_path, run, clips_dir, video_filter, threads, progress=None, run_index=0):
+    """
+    Encode a run of consecutive clips with one ffmpeg process (runs inside a worker process)
+    The source is decoded sequentially exactly once: keyframes are forced on
+    every clip boundary and the segment muxer is given the same boundaries, so it
+    starts a new clip_N.mp4 on exactly those frames.
+    """
+    first_number, run_start, _ = run[0]
+    run_end = run[-1][2]
+    # Clip boundaries relative to the start of the run (the output timestamps start at 0)
+    boundaries = ",".join(f"{end - run_start:g}" for _, _, end in run[:-1])
+
+    args = ["-ss", str(run_start), "-i", source_path, "-t", str(run_end - run_start)]
+    if video_filter:
+        args += ["-vf", video_filter]
+    args += [
+        "-c:v", "libx264", "-c:a", "aac",
+        "-threads", str(threads),
+    ]
+    if boundaries:
+        # A forced keyframe can land a hair before its boundary once rounded to the
+        # time base: segment_time_delta lets the muxer cut on it instead of the next one
+        args += ["-force_key_frames", boundaries, "-segment_times", boundaries,
+                 "-segment_time_delta", str(SEGMENT_TIME_DELTA)]
+    args += [
+        "-f", "segment",
+        "-segment_start_number", str(first_number),
+        "-reset_timestamps", "1",
+        "-segment_format_options", "movflags=+faststart",
+        os.path.join(clips_dir.replace("%", "%%"), "clip_%d.mp4"),
+    ]
+
+    paths = [clip_path(clips_dir, number) for number, _, _ in run]
+    for path in paths:
+        unlink_existing(path)
+    on_progress = (lambda report: progress.put((run_index, len(run), report))) if progress is not None else None
+    try:
+        run_ffmpeg(args, on_progress)
+    except Exception:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return paths
+
+
+def encode_clips(source_path, clips_dir, segments, mobile_format=True, crop_position='center',
+                 parallel_processing=True, progress_callback=None):
+    """
+    Encode the planned segments of source_path into clip_N.mp4 files
+    Consecutive segments are grouped into runs that are decoded once and split
+    into clips by ffmpeg; the runs are handed to a pool of worker processes (one
+    per core at most) and ffmpeg threads are split between the workers. The
+    mobile conversion is applied as an ffmpeg filter graph.
+    Args:
+        progress_callback: Called with the RenderProgress stats while the clips are encoded
+    Returns:
+        list: Paths of the created clips, in clip order
+    """
+    os.makedirs(clips_dir, exist_ok=True)
+    if not segments:
+        return []
+
+    video_filter = None
+    if mobile_format:
+        width, height = get_frame_size(probe_video(source_path))
+        video_filter = mobile_filter_graph(width, height, crop_position)
+
+    worker_count = get_worker_count(len(segments), parallel_processing)
+    runs = split_into_runs(segments, worker_count)
+    workers = min(worker_count, len(runs))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    tracker = RenderProgress(clips_dir, segments, progress_callback) if progress_callback else None
+
+    if workers == 1:
+        for index, run in enumerate(runs):
+            for path in _encode_run(source_path, run, clips_dir, video_filter, threads, tracker, index):
+                print(f"Created clip: {path}")
+        if tracker:
+            tracker.report(force=True)
+        return [clip_path(clips_dir, number) for number, _, _ in segments]
+
+    print(f"Encoding {len(segments)} clips with {workers} worker processes")
+    # Worker processes send their ffmpeg reports back through a manager queue
+    manager = multiprocessing.Manager() if tracker else None
+    progress_queue = manager.Queue() if manager else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(_encode_run, source_path, run, clips_dir, video_filter, threads,
+                                   progress_queue, index)
+                       for index, run in enumerate(runs)}
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                _drain_progress(progress_queue, tracker)
+                for future in done:
+                    for path in future.result():
+                        print(f"Created clip: {path}")
+        if tracker:
+            _drain_progress(progress_queue, tracker)
+            tracker.report(force=True)
+    finally:
+        if manager:
+            manager.shutdown()
+
+    return [clip_path(clips_dir, number) for number, _, _ in segments]
+
+
+def _drain_progress(progress_queue, tracker):
+    """Hand the reports queued by worker processes to the tracker"""
+    if progress_queue is None:
+        return
+    while True:
+        try:
+            tracker.put(progress_queue.get_nowait())
+        except queue.Empty:
+            return
+
+
+def clip_render_params(mobile_format, stream_copy=True, crop_position='center'):
+    """Parameters that identify how a clip was rendered (part of its clip store key)"""
+    use_copy = stream_copy and not mobile_format
+    return {"mode": "copy" if use_copy else "encode", "codec": "libx264", "aac": True,
+            "mobile_format": mobile_format, "crop_position": crop_position if mobile_format else None}
+
+
+def link_stored_clips(clips_dir, segments, mobile_format, stream_copy=True, crop_position='center',
+                      clip_store=None, source_key=None):
+    """
+    Link the clips already in the clip store into clips_dir and record them in the inventory
+    (nothing is linked or to be stored when the store is on another filesystem)
+    Returns:
+        tuple: (segments still to render, [(segment, key)] to add to the store once rendered)
+    """
+    # Stored clips are shared through hard links: folders on another filesystem don't use the store
+    if not (clip_store and source_key and clip_store.usable_for(clips_dir)):
+        return segments, []
+
+    params = clip_render_params(mobile_format, stream_copy, crop_position)
+    stored, missing = clip_store.split_segments(source_key, segments, params)
+    linked = []
+    for segment, key in stored:
+        number = segment[0]
+        if clip_store.link(key, number, clips_dir, clip_path(clips_dir, number)):
+            print(f"Reused stored clip: {clip_path(clips_dir, number)}")
+            linked.append(number)
+        else:
+            missing.append((segment, key))
+    missing.sort()
+    # Linked clips are in the folder from now on, whatever happens to the ones still to render
+    inventory.add_clips(clips_dir, linked)
+    return [segment for segment, _ in missing], missing
+
+
+def render_clips(source_path, clips_dir, segments, mobile_format=True, stream_copy=True, crop_position='center',
+                 parallel_processing=True, clip_store=None, source_key=None, progress_callback=None):
+    """
+    Create the planned clip_N.mp4 files of a source
+    Clips are remuxed when no reframing is needed (falling back to encoding if
+    the source can't be copied) and encoded otherwise. With a clip_store and a
+    source_key, clips rendered before with the same parameters (for any account)
+    are linked from the store instead of being rendered again.
+    progress_callback receives the RenderProgress stats of the clips being rendered.
+    Returns:
+        list: Paths of the clips, in clip order
+    """
+    os.makedirs(clips_dir, exist_ok=True)
+    use_copy = stream_copy and not mobile_format
+    to_render, missing = link_stored_clips(clips_dir, segments, mobile_format, stream_copy, crop_position,
+                                           clip_store, source_key)
+
+    if to_render:
+        copied = False
+        if use_copy:
+            try:
+                stream_copy_clips(source_path, clips_dir, to_render, progress_callback)
+                copied = True
+            except Exception as e:
+                print(f"Stream copy not possible ({e}), re-encoding clips")
+
+        if not copied:
+            encode_clips(source_path, clips_dir, to_render, mobile_format=mobile_format,
+                         crop_position=crop_position, parallel_processing=parallel_processing,
+                         progress_callback=progress_callback)
+
+    for (number, _, _), key in missing:
+        clip_store.add(key, number, clips_dir, clip_path(clips_dir, number))
+
+    inventory.add_clips(clips_dir, [number for number, _, _ in segments])
+    return [clip_path(clips_dir, number) for number, _, _ in segments]
+
+
+def render_remote_clip(video_url, audio_url, start, end, output_path, video_filter=None):
+    """
+    Render [start, end) of remote video/audio streams straight into one clip
+    Only the byte ranges covering the clip are requested; the frames are copied,
+    or encoded through video_filter when one is given.
+    """
+    http_options = ["-reconnect", "1", "-reconnect_delay_max", "10"]
+    args = (http_options + ["-ss", str(start), "-i", video_url] +
+            http_options + ["-ss", str(start), "-i", audio_url] +
+            ["-t", str(end - start), "-map", "0:v:0", "-map", "1:a:0"])
+    if video_filter:
+        args += ["-vf", video_filter, "-c:v", "libx264", "-c:a", "aac"]
+    else:
+        args += ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+    args += ["-movflags", "+faststart", "-f", "mp4", output_path]
+    try:
+        run_ffmpeg(args)
+    except Exception:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+
+
+def stream_remote_clips(video_url, audio_url, clips_dir, segments, mobile_format=True, crop_position='center',
+                        frame_size=None, parallel_processing=True, on_clip=None):
+    """
+    Create clip_N.mp4 files from remote streams without downloading the source first
+    Each segment is fetched and rendered on its own, so the first clip is ready
+    after one clip's worth of data instead of the whole video, and downloads of
+    later clips overlap with the encoding of earlier ones. Clips are written to a
+    temporary name and moved into clips_dir strictly in clip order.
+    Args:
+        frame_size (tuple): (width, height) of the video stream, probed when needed and not given
+        on_clip: Called with (path, clips_done, clip_count) as each clip lands
+    Returns:
+        list: Paths of the created clips, in clip order
+    """
+    os.makedirs(clips_dir, exist_ok=True)
+    if not segments:
+        return []
+
+    video_filter = None
+    if mobile_format:
+        width, height = frame_size or get_frame_size(probe_video(video_url))
+        video_filter = mobile_filter_graph(width, height, crop_position)
+
+    # Each clip is one ffmpeg process: threads are enough to keep several running
+    workers = get_worker_count(len(segments), parallel_processing)
+    created = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                (number, pool.submit(render_remote_clip, video_url, audio_url, start, end,
+                                     clip_path(clips_dir, number) + ".part", video_filter))
+                for number, start, end in segments
+            ]
+            for number, future in futures:
+                try:
+                    future.result()
+                except Exception:
+                    for _, pending in futures:
+                        pending.cancel()
+                    raise
+                path = clip_path(clips_dir, number)
+                os.replace(path + ".part", path)
+                inventory.add_clips(clips_dir, [number])
+                created.append(path)
+                print(f"Created clip: {path}")
+                if on_clip:
+                    on_clip(path, len(created), len(segments))
+    finally:
+        # Clips rendered after a failed one never land
+        for number, _, _ in segments:
+            if os.path.exists(clip_path(clips_dir, number) + ".part"):
+                os.remove(clip_path(clips_dir, number) + ".part")
+    return created
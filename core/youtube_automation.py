@@ -1,12 +1,11 @@
-import datetime as datetime
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import google_auth_oauthlib
 from pytubefix import YouTube
-from moviepy.editor import VideoFileClip, AudioFileClip
 import os
 import re
-import json
 
 # PIL compatibility fix for newer versions
 try:
@@ -24,6 +23,34 @@ import pickle
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
+try:
+    from core.downloader import SegmentedDownloader, RateLimiter
+    from core.source_cache import SourceCache
+    from core.clip_inventory import inventory
+    from core.upload_ledger import ledger_for
+    from core.resumable_upload import chunked_media, upload_resumable, DEFAULT_CHUNK_SIZE
+except ImportError:
+    from downloader import SegmentedDownloader, RateLimiter
+    from source_cache import SourceCache
+    from clip_inventory import inventory
+    from upload_ledger import ledger_for
+    from resumable_upload import chunked_media, upload_resumable, DEFAULT_CHUNK_SIZE
+
+try:
+    from core.video_processing import (probe_video, mux_video_audio, fetch_remote_window, plan_clip_window,
+                                       plan_clip_segments, render_clips, link_stored_clips,
+                                       stream_remote_clips, clip_path, mobile_crop_box)
+except ImportError:
+    from video_processing import (probe_video, mux_video_audio, fetch_remote_window, plan_clip_window,
+                                  plan_clip_segments, render_clips, link_stored_clips,
+                                  stream_remote_clips, clip_path, mobile_crop_box)
+
+# Bitrate mínimo del audio descargado (bps)
+MIN_AUDIO_BITRATE = 128000
+# Escalado máximo aceptado de la región recortada hasta el tamaño de salida: con 1.8 un video
+# 16:9 de 1080p o 1440p ya sirve para Shorts (1080x1920) y casi nunca hace falta el de 4K
+MAX_UPSCALE = 1.8
+
 
 class YouTubeAutomation:
     def __init__(self, url="", output_path='output', account_name="", acc_data=None):
@@ -41,45 +68,239 @@ class YouTubeAutomation:
         self.original_video_title = None  # Store original YouTube video title
         self.scopes = ["https://www.googleapis.com/auth/youtube.upload"]
         self.po_token = None
+        self.yt = None  # YouTube object (metadata fetched once per URL)
+        self.progress_callback = None  # Called with the combined download progress (0.0 - 1.0)
+        self._download_progress = {}
+        self._download_lock = threading.Lock()
+        self.download_connections = 4  # Conexiones paralelas por stream
+        self.download_bandwidth = None  # Límite total de descarga en Mbit/s (None = sin límite)
+        self._rate_limiter = None
+        self.clip_window = None  # (inicio, fin) del video original cubierto por final_output_path
+        self.source_cache = None  # SourceCache compartida entre cuentas (opcional)
+        self._source_key = None
+        self._pinned_sources = []  # Claves fijadas en la caché hasta release_sources()
+        self.clip_store = None  # ClipStore compartida: clips ya renderizados se enlazan en vez de recodificarse
+        self.upload_chunk_size = DEFAULT_CHUNK_SIZE  # Bytes por trozo de la subida reanudable
+        self.upload_retries = 3  # Reintentos seguidos de un trozo antes de abandonar la subida
+        self.upload_progress_callback = None  # Recibe (bytes enviados, bytes totales) durante la subida
 
     @staticmethod
     def sanitize_filename(filename):
         return re.sub(r'[\\/*?:"<>|]', "", filename)
 
-    def download_video(self):
-        yt = YouTube(self.url)
+    def get_youtube(self):
+        """Fetch and parse the watch page once and reuse it for every stream"""
+        if self.yt is None:
+            self.yt = YouTube(self.url)
+            # Store original title for later use in clip titles
+            self.original_video_title = self.yt.title
+        return self.yt
+
+    def _on_download_progress(self, stream, chunk, bytes_remaining):
+        """Combine the progress of the streams being downloaded and report it"""
+        with self._download_lock:
+            self._download_progress[stream.itag] = (stream.filesize - bytes_remaining, stream.filesize)
+            done = sum(d for d, _ in self._download_progress.values())
+            total = sum(t for _, t in self._download_progress.values())
+
+        if self.progress_callback and total:
+            self.progress_callback(done / total)
+
+    def get_video_stream(self, target_size=None, max_upscale=MAX_UPSCALE):
+        """
+        Elige el stream de video más pequeño que cubre el tamaño de salida
+        Para el formato móvil se tiene en cuenta el recorte 9:16: solo cuenta la
+        región que queda tras recortar, que puede ampliarse hasta max_upscale veces
+        (solo en salidas verticales; las horizontales no se amplían).
+        Si ningún stream lo cubre, se usa el mayor.
+        Args:
+            target_size (tuple): (ancho, alto) de salida, por defecto el de YouTube Shorts
+            max_upscale (float): Escalado máximo aceptado de la región recortada (1 = sin ampliar)
+        """
+        yt = self.get_youtube()
+        target_size = target_size or self.get_platform_dimensions('youtube_shorts')
+        target_width, target_height = target_size
+        streams = yt.streams.filter(only_video=True, file_extension='mp4')
+        upscale = max_upscale if target_height > target_width else 1
+
+        candidates = [stream for stream in streams if stream.width and stream.height]
+        if not candidates:
+            return streams.order_by('resolution').desc().first()
+
+        def covers_target(stream):
+            x1, y1, x2, y2 = mobile_crop_box(stream.width, stream.height, target_size=target_size)
+            return (x2 - x1) * upscale >= target_width and (y2 - y1) * upscale >= target_height
+
+        # Menor resolución primero; a igual resolución se prefiere H.264 (se puede copiar a mp4)
+        def sort_key(stream):
+            return stream.width * stream.height, not (stream.video_codec or "").startswith("avc1")
+
+        covering = [stream for stream in candidates if covers_target(stream)]
+        if covering:
+            return min(covering, key=sort_key)
+        return max(candidates, key=lambda stream: (stream.width * stream.height, (stream.video_codec or "").startswith("avc1")))
+
+    def get_audio_stream(self, min_bitrate=MIN_AUDIO_BITRATE):
+        """
+        Elige el stream de audio de menor bitrate que alcanza min_bitrate (bps)
+        Se prefieren los streams mp4 (AAC), que se pueden copiar sin recodificar.
+        Si ninguno lo alcanza, se usa el de mayor bitrate.
+        """
+        yt = self.get_youtube()
+        streams = yt.streams.filter(only_audio=True)
+        candidates = [stream for stream in streams if stream.subtype == 'mp4'] or list(streams)
+        if not candidates:
+            return None
+
+        adequate = [stream for stream in candidates if (stream.bitrate or 0) >= min_bitrate]
+        if adequate:
+            return min(adequate, key=lambda stream: stream.bitrate)
+        return max(candidates, key=lambda stream: stream.bitrate or 0)
+
+    def download_video(self, video_stream=None):
+        yt = self.get_youtube()
         title = self.sanitize_filename(yt.title)
-        # Store original title for later use in clip titles
-        self.original_video_title = yt.title
-        video_stream = yt.streams.filter(only_video=True, file_extension='mp4').order_by('resolution').desc().first()
+        video_stream = video_stream or self.get_video_stream()
         self.video_path = os.path.join(self.output_path, f"{title}_video.mp4")
-        video_stream.download(output_path=self.output_path, filename=f"{title}_video.mp4")
+        self._download_stream(video_stream, self.video_path)
         print(f"Video downloaded to {self.video_path}")
 
-    def download_audio(self):
-        yt = YouTube(self.url)
+    def download_audio(self, audio_stream=None):
+        yt = self.get_youtube()
         title = self.sanitize_filename(yt.title)
-        audio_stream = yt.streams.filter(only_audio=True).first()
+        audio_stream = audio_stream or self.get_audio_stream()
         self.audio_path = os.path.join(self.output_path, f"{title}_audio.mp4")
-        audio_stream.download(output_path=self.output_path, filename=f"{title}_audio.mp4")
+        self._download_stream(audio_stream, self.audio_path)
         print(f"Audio downloaded to {self.audio_path}")
 
+    def _download_stream(self, stream, path):
+        """
+        Descarga un stream por rangos de bytes en paralelo
+        Si la descarga se interrumpe, la siguiente llamada continúa desde los rangos ya completados.
+        Todas las descargas de este objeto comparten el límite de download_bandwidth.
+        """
+        with self._download_lock:
+            if self._rate_limiter is None and self.download_bandwidth:
+                self._rate_limiter = RateLimiter(self.download_bandwidth * 1000000 / 8)
+
+        downloader = SegmentedDownloader(
+            stream.url, path,
+            connections=self.download_connections,
+            rate_limiter=self._rate_limiter,
+            progress_callback=lambda done, total: self._on_download_progress(stream, None, total - done)
+        )
+        downloader.download(stream.filesize)
+
+    def download_streams(self, target_size=None):
+        """
+        Descarga el video y el audio a la vez
+        Los metadatos del video se obtienen una sola vez y el progreso combinado
+        de ambas descargas se notifica a progress_callback.
+        Args:
+            target_size (tuple): (ancho, alto) de los clips que se van a crear
+        """
+        video_stream = self.get_video_stream(target_size)
+        audio_stream = self.get_audio_stream()
+
+        # El video completo no es una ventana de clips
+        self.clip_window = None
+
+        # Si este video ya se descargó con los mismos streams, se reutiliza (final_output_path queda listo)
+        self._source_key = SourceCache.make_key(self.get_youtube().video_id, video_stream.itag, audio_stream.itag)
+        if self._use_cached_source(self._source_key):
+            return
+
+        # Registrar ambos streams para que el progreso combinado use el tamaño total
+        with self._download_lock:
+            self._download_progress = {
+                video_stream.itag: (0, video_stream.filesize),
+                audio_stream.itag: (0, audio_stream.filesize),
+            }
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            video_future = pool.submit(self.download_video, video_stream)
+            audio_future = pool.submit(self.download_audio, audio_stream)
+            video_future.result()
+            audio_future.result()
+
+    def download_clip_window(self, clip_duration=57, target_size=None, start_time=None, end_time=None):
+        """
+        Descarga solo la parte del video que se va a convertir en clips
+        Se planifica primero la ventana de clips (sin el primer segmento ni el último
+        clip incompleto, o el rango start_time/end_time pedido) y se descargan y
+        combinan únicamente los rangos de video y audio que la cubren.
+        Returns:
+            bool: False si el video no da para ningún clip
+        """
+        yt = self.get_youtube()
+        window = plan_clip_window(yt.length, clip_duration, start_time, end_time)
+        if window is None:
+            print("El video es demasiado corto para crear clips")
+            return False
+
+        video_stream = self.get_video_stream(target_size)
+        audio_stream = self.get_audio_stream()
+
+        # Un video completo ya descargado cubre la ventana por defecto
+        full_key = SourceCache.make_key(yt.video_id, video_stream.itag, audio_stream.itag)
+        if start_time is None and end_time is None and self._use_cached_source(full_key):
+            self._source_key = full_key
+            return True
+
+        source_key = SourceCache.make_key(yt.video_id, video_stream.itag, audio_stream.itag, window)
+        self._source_key = source_key
+        if self._use_cached_source(source_key):
+            self.clip_window = window
+            return True
+
+        title = self.sanitize_filename(yt.title)
+        final_output_path = os.path.join(self.output_path, f"{title}_video_final.mp4")
+
+        print(f"Descargando solo {window[0]}s - {window[1]}s de {yt.length}s")
+        fetch_remote_window(video_stream.url, audio_stream.url, window[0], window[1], final_output_path)
+        print(f"Final video with audio saved to {final_output_path}")
+
+        self.final_output_path = self._store_source(source_key, final_output_path)
+        # Solo ahora final_output_path cubre la ventana (si la descarga falla se usa el video completo)
+        self.clip_window = window
+        return True
+
+    def _use_cached_source(self, source_key):
+        """Usa el video de la caché compartida si ya está descargado"""
+        cached_path = self.source_cache.get(source_key, pin=True) if self.source_cache else None
+        if cached_path:
+            self._pinned_sources.append(source_key)
+            print(f"Using cached source {cached_path}")
+            self.final_output_path = cached_path
+            return True
+        return False
+
+    def _store_source(self, source_key, final_output_path):
+        """Guarda el video combinado en la caché compartida y devuelve su ruta final"""
+        if self.source_cache and source_key:
+            cached_path = self.source_cache.put(source_key, final_output_path, pin=True)
+            self._pinned_sources.append(source_key)
+            return cached_path
+        return final_output_path
+
+    def release_sources(self):
+        """Libera los videos fijados en la caché compartida (llamar al terminar los clips)"""
+        while self._pinned_sources:
+            self.source_cache.release(self._pinned_sources.pop())
+
     def combine_video_audio(self):
         if self.video_path and self.audio_path:
-            video_clip = VideoFileClip(self.video_path)
-            audio_clip = AudioFileClip(self.audio_path)
-
-            final_clip = video_clip.set_audio(audio_clip)
             final_output_path = os.path.join(self.output_path,
                                              f"{os.path.splitext(os.path.basename(self.video_path))[0]}_final.mp4")
-            final_clip.write_videofile(final_output_path, codec='libx264', audio_codec='aac')
+            # Ambos streams ya vienen en mp4: se combinan a nivel de contenedor, sin recodificar
+            mux_video_audio(self.video_path, self.audio_path, final_output_path)
             print(f"Final video with audio saved to {final_output_path}")
 
             os.remove(self.video_path)
             os.remove(self.audio_path)
             print("Temporary files removed.")
 
-            self.final_output_path = final_output_path
+            self.final_output_path = self._store_source(self._source_key, final_output_path)
         else:
             print("Video or audio file is missing. Please download both before combining.")
 
@@ -91,22 +312,32 @@ class YouTubeAutomation:
             upload_short (bool): Si True, sube el video como short
             mobile_format (bool): Si True, los clips se crean en formato vertical móvil
         """
-        self.download_video()
-        self.download_audio()
-        self.combine_video_audio()
+        platform = 'youtube_shorts' if mobile_format else 'youtube_standard'
+        self.download_streams(self.get_platform_dimensions(platform))
+        if not self.final_output_path:
+            self.combine_video_audio()
 
         if create_clips:
-            self.create_clips(mobile_format=mobile_format)
+            try:
+                self.create_clips(mobile_format=mobile_format)
+            finally:
+                self.release_sources()
 
         if upload_short:
             self.upload_and_log_short()
 
     def upload_and_log_short(self):
+        """
+        Sube el siguiente clip pendiente de la cuenta como short y lo registra
+        Returns:
+            bool: True si se subió, False si la subida falló (o no se pudo autenticar),
+                None si no había ningún clip que subir
+        """
         credentials = self.authenticate_youtube_account(self.account_name)
 
         if not credentials:
             print("No se pudo autenticar con la cuenta de YouTube")
-            return
+            return False
         else:
             project_root = os.path.dirname(os.path.dirname(__file__))
             token_file = os.path.join(project_root, "web_app/backend/youtube_automation/account_tokens", f"token_{self.account_name}.pickle")
@@ -117,146 +348,180 @@ class YouTubeAutomation:
 
         youtube = googleapiclient.discovery.build("youtube", "v3", credentials=credentials)
 
-        # Determinar el siguiente clip a subir
-        log_file = f"E:\CODING\Python\SocialMediaAutomation\web_app/backend\youtube_automation\logs/{self.account_name}_uploaded_videos.json"
-        clip_filename, part_number = self.get_next_clip_to_upload(log_file)
+        # Determinar el siguiente clip a subir (queda reservado hasta marcarlo como subido o fallido)
+        ledger = self.upload_ledger()
+        clip_filename, part_number = self.get_next_clip_to_upload()
         
         if not clip_filename:
             print(f"No clips available to upload for account {self.account_name}")
-            return False
+            return None
 
-        file_path = f"{self.clips_folder}/clips/{clip_filename}"
+        try:
+            file_path = f"{self.clips_folder}/clips/{clip_filename}"
+
+            # Generate title - use configured title or fallback to original video title
+            account_title = (self.acc_data.get("title") or "").strip()
+            if account_title:
+                title = account_title + " pt: " + str(part_number)
+            elif self.original_video_title:
+                # Use original video title + part number
+                title = f"{self.original_video_title} - Part {part_number}"
+            else:
+                # Final fallback to generic title
+                title = f"Video Clip #{part_number}"
 
-        # Generate title - use configured title or fallback to original video title
-        account_title = self.acc_data.get("title", "").strip()
-        if account_title:
-            title = account_title + " pt: " + str(part_number)
-        elif self.original_video_title:
-            # Use original video title + part number
-            title = f"{self.original_video_title} - Part {part_number}"
-        else:
-            # Final fallback to generic title
-            title = f"Video Clip #{part_number}"
-        
-        # Generate description
-        account_description = self.acc_data.get("description", "").strip()
-        if account_description:
-            description = account_description + " pt: " + str(part_number)
-        else:
-            description = f"Automatically generated video clip #{part_number}"
+            # Generate description
+            account_description = (self.acc_data.get("description") or "").strip()
+            if account_description:
+                description = account_description + " pt: " + str(part_number)
+            else:
+                description = f"Automatically generated video clip #{part_number}"
 
-        # Generate an array of tags from ,
-        tags = self.acc_data.get("tags")
+            # Generate an array of tags from ,
+            tags = self.acc_data.get("tags")
 
-        if tags:
-            tags = tags.split(",")
+            if tags:
+                tags = tags.split(",")
 
-        # Subir el short
-        response = self.upload_short(youtube, file_path, tags,
-                                     description, title,
-                                     self.acc_data.get("category_id"))
+            # Subir el short
+            response = self.upload_short(youtube, file_path, tags,
+                                         description, title,
+                                         self.acc_data.get("category_id"))
+        except Exception as e:
+            # Liberar el clip para que se reintente
+            ledger.fail(part_number, str(e))
+            raise
 
         if (response):
             print(f"Short numero {part_number} subido correctamente")
 
-            # Registrar el video en el JSON
-            self.log_video(title, clip_filename)
+            # Registrar el video en el ledger
+            ledger.complete(part_number, title, self.account_name)
+            return True
         else:
+            ledger.fail(part_number, "Upload failed")
             print("Short no subido por un error ocurrido")
+            return False
 
-    def get_next_clip_to_upload(self, log_file):
-        """Get the next clip file that hasn't been uploaded yet"""
-        # Get list of uploaded clips from log
-        uploaded_clips = set()
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                data = json.load(f)
-                for video in data.get("videos", []):
-                    # Extract clip number from filename if stored
-                    if "clip_file" in video:
-                        uploaded_clips.add(video["clip_file"])
-        
-        # Get available clips in the folder
+    def upload_ledger(self):
+        """Ledger y cola de subidas de la cuenta"""
+        return ledger_for(f"E:\CODING\Python\SocialMediaAutomation\web_app/backend\youtube_automation\logs/{self.account_name}_uploaded_videos.json")
+
+    def get_next_clip_to_upload(self):
+        """
+        Reserva el siguiente clip pendiente de la cola de subidas de la cuenta
+        Returns:
+            tuple: (nombre del clip, número) o (None, None) si no queda ninguno
+        """
         clips_folder = os.path.join(self.clips_folder, "clips")
         if not os.path.exists(clips_folder):
-            return None, 1
-        
-        # Get all clip files and sort them numerically
-        clip_files = []
-        for file in os.listdir(clips_folder):
-            if file.startswith("clip_") and file.endswith(".mp4"):
-                try:
-                    # Extract number from filename like "clip_1.mp4"
-                    clip_num = int(file.split("_")[1].split(".")[0])
-                    clip_files.append((clip_num, file))
-                except (ValueError, IndexError):
-                    continue
-        
-        # Sort by clip number
-        clip_files.sort(key=lambda x: x[0])
-        
-        # Find first clip that hasn't been uploaded
-        for clip_num, filename in clip_files:
-            if filename not in uploaded_clips:
-                return filename, clip_num
-        
-        # If all clips have been uploaded, return None
-        return None, len(uploaded_clips) + 1
+            return None, None
+        return self.upload_ledger().claim_next(clips_folder)
 
-    def create_clips(self, mobile_format=True, clip_duration=57):
+    def create_clips(self, mobile_format=True, clip_duration=57, stream_copy=True, parallel_processing=True,
+                     progress_callback=None):
         """
         Crea clips del video descargado
         Args:
             mobile_format (bool): Si True, convierte a formato vertical móvil (9:16)
             clip_duration (int): Duración de cada clip en segundos
+            stream_copy (bool): Si True y no hay formato móvil, corta los clips sin recodificar
+                (los cortes se alinean con los keyframes del video)
+            parallel_processing (bool): Si True, los clips se codifican en paralelo (un proceso por núcleo)
+            progress_callback: Recibe las estadísticas del renderizado (frames, fps, clips hechos, bytes, ETA)
         """
         video_path = self.final_output_path
 
         # Si se descargó el video, proceder a crear los clips
         if video_path and os.path.exists(video_path):
-            # Cargar el video descargado
-            video = VideoFileClip(video_path)
-
             # Definir la duración del clip en segundos
             print(f"Creando clips de {clip_duration} segundos cada uno")
             if mobile_format:
                 print("Formato móvil activado - los clips se convertirán a 9:16")
-            total_duration = int(video.duration)  # Duración total del video
-
-            # Crear clips en un bucle
-            # Se hace esa resta para evitar el primer clip
-            number_of_clips = len(os.listdir("clips"))
-
-            for start in range(clip_duration, total_duration, clip_duration):
-                end = min(start + clip_duration, total_duration)  # Asegurarse de que no sobrepase la duración total
-
-                # Si el clip dura menos que la duración deseada, no se hace
-                if end - start < clip_duration:
-                    break
-
-                clip = video.subclip(start, end)
-                
-                # Convertir a formato vertical móvil (9:16) si está habilitado
-                if mobile_format:
-                    clip = self.convert_to_mobile_format(clip)
-
-                path = ""
-
-                # Si hay algun clip en la carpeta clips, se le suma 1 al nombre
-                number = start // clip_duration
-
-                if number_of_clips > 0:
-                    number += number_of_clips
-
-                path = os.path.join("clips", f"clip_{number}.mp4")
+            if self.clip_window:
+                # El archivo contiene exactamente la ventana planificada
+                total_duration = self.clip_window[1] - self.clip_window[0]
+            else:
+                total_duration = int(probe_video(video_path)["duration"])  # Duración total del video
 
-                clip.write_videofile(path, codec='libx264', audio_codec='aac')
+            clips_dir = os.path.join(self.output_path, "clips")
+            os.makedirs(clips_dir, exist_ok=True)
 
-            # Cerrar el objeto de video
-            video.close()
+            # Si hay algun clip en la carpeta clips, se continúa la numeración
+            number_of_clips = inventory.count(clips_dir)
+            if self.clip_window:
+                # Solo se descargó la ventana de clips: se usa entera
+                segments = plan_clip_segments(total_duration, clip_duration, skip_first=False,
+                                              number_offset=number_of_clips + 1)
+            else:
+                # Se salta el primer segmento y el último clip incompleto
+                segments = plan_clip_segments(total_duration, clip_duration, skip_first=True,
+                                              number_offset=number_of_clips)
+
+            # Sin reencuadre basta con remuxar cada segmento; con formato móvil cada segmento se
+            # codifica en su propio proceso. Los clips ya renderizados de esta fuente se enlazan
+            # desde el almacén de clips.
+            render_clips(video_path, clips_dir, segments, mobile_format=mobile_format, stream_copy=stream_copy,
+                         parallel_processing=parallel_processing, clip_store=self.clip_store,
+                         source_key=self._source_key, progress_callback=progress_callback)
         else:
             print("No se pudo descargar el video.")
 
+    def stream_clips(self, mobile_format=True, clip_duration=57, target_size=None, start_time=None, end_time=None,
+                     parallel_processing=True):
+        """
+        Crea los clips directamente desde los streams remotos, sin descargar antes el video
+        Cada clip se descarga y se renderiza por separado en cuanto se pide, así que el
+        primero está listo tras descargar un clip en vez del video entero, y la red se
+        solapa con la codificación de los siguientes. Los clips llegan a la carpeta en orden.
+        Si el video completo ya está en la caché compartida, se corta desde ahí.
+        Returns:
+            bool: False si el video no da para ningún clip
+        """
+        yt = self.get_youtube()
+        window = plan_clip_window(yt.length, clip_duration, start_time, end_time)
+        if window is None:
+            print("El video es demasiado corto para crear clips")
+            return False
+
+        video_stream = self.get_video_stream(target_size)
+        audio_stream = self.get_audio_stream()
+        self._source_key = SourceCache.make_key(yt.video_id, video_stream.itag, audio_stream.itag)
+
+        clips_dir = os.path.join(self.output_path, "clips")
+        os.makedirs(clips_dir, exist_ok=True)
+        number_of_clips = inventory.count(clips_dir)
+
+        # Segmentos con tiempos absolutos del video original
+        segments = [(number, start + window[0], end + window[0]) for number, start, end in
+                    plan_clip_segments(window[1] - window[0], clip_duration, skip_first=False,
+                                       number_offset=number_of_clips + 1)]
+
+        if self._use_cached_source(self._source_key):
+            try:
+                render_clips(self.final_output_path, clips_dir, segments, mobile_format=mobile_format,
+                             parallel_processing=parallel_processing, clip_store=self.clip_store,
+                             source_key=self._source_key)
+            finally:
+                self.release_sources()
+            return True
+
+        to_render, missing = link_stored_clips(clips_dir, segments, mobile_format, clip_store=self.clip_store,
+                                               source_key=self._source_key)
+
+        def on_clip(path, clips_done, clip_count):
+            if self.progress_callback:
+                self.progress_callback(clips_done / clip_count)
+
+        print(f"Creando {len(to_render)} clips de {clip_duration} segundos desde los streams remotos")
+        stream_remote_clips(video_stream.url, audio_stream.url, clips_dir, to_render, mobile_format=mobile_format,
+                            frame_size=(video_stream.width, video_stream.height) if video_stream.width else None,
+                            parallel_processing=parallel_processing, on_clip=on_clip)
+
+        for (number, _, _), key in missing:
+            self.clip_store.add(key, number, clips_dir, clip_path(clips_dir, number))
+        return True
+
     def convert_to_mobile_format(self, clip, crop_position='center'):
         """
         Convierte un clip a formato vertical móvil (9:16 aspect ratio)
@@ -278,48 +543,14 @@ class YouTubeAutomation:
         print(f"Video original: {current_width}x{current_height} (ratio: {current_ratio:.2f})")
         print(f"Formato móvil objetivo: {target_width}x{target_height} (ratio: {target_ratio:.2f})")
         
-        if current_ratio < target_ratio:
-            # El video es más ancho que el formato móvil - recortar horizontalmente
-            # Calcular nueva anchura manteniendo la altura
-            new_width = int(current_height / target_ratio)
-            
-            # Determinar posición de recorte horizontal
-            if crop_position == 'left':
-                x_start = 0
-            elif crop_position == 'right':
-                x_start = current_width - new_width
-            else:  # center por defecto
-                x_center = current_width / 2
-                x_start = int(x_center - new_width / 2)
-            
-            x_start = max(0, x_start)
-            x_end = min(current_width, x_start + new_width)
-            
-            # Recortar el video
-            clip = clip.crop(x1=x_start, x2=x_end)
-            print(f"Recortado horizontalmente ({crop_position}): {new_width}x{current_height}")
-            
-        elif current_ratio > target_ratio:
-            # El video es más alto que el formato móvil - recortar verticalmente
-            # Calcular nueva altura manteniendo la anchura
-            new_height = int(current_width * target_ratio)
-            
-            # Determinar posición de recorte vertical
-            if crop_position == 'top':
-                y_start = 0
-            elif crop_position == 'bottom':
-                y_start = current_height - new_height
-            else:  # center por defecto, con ligero sesgo hacia arriba para mejor encuadre
-                y_center = current_height / 2
-                y_offset = current_height * 0.05  # 5% hacia arriba para mejor composición
-                y_start = int(y_center - new_height / 2 - y_offset)
-            
-            y_start = max(0, y_start)
-            y_end = min(current_height, y_start + new_height)
-            
+        # Región a conservar (recorte horizontal si es más ancho, vertical si es más alto)
+        x_start, y_start, x_end, y_end = mobile_crop_box(current_width, current_height, crop_position,
+                                                         (target_width, target_height))
+        
+        if (x_start, y_start, x_end, y_end) != (0, 0, current_width, current_height):
             # Recortar el video
-            clip = clip.crop(y1=y_start, y2=y_end)
-            print(f"Recortado verticalmente ({crop_position}): {current_width}x{new_height}")
+            clip = clip.crop(x1=x_start, y1=y_start, x2=x_end, y2=y_end)
+            print(f"Recortado ({crop_position}): {x_end - x_start}x{y_end - y_start}")
         
         # Redimensionar al tamaño exacto para móvil con algoritmo de alta calidad
         clip = clip.resize((target_width, target_height))
@@ -418,42 +649,15 @@ class YouTubeAutomation:
                     "selfDeclaredMadeForKids": False
                 }
             },
-            media_body=file_path
+            media_body=chunked_media(file_path, self.upload_chunk_size)
         )
         response = None
 
+        # Subida por trozos: un fallo de red se reintenta desde el último byte confirmado
         try:
-            response = request.execute()
-        except:
-            print("Probablemente error de timeout")
+            response = upload_resumable(request, max_retries=self.upload_retries,
+                                        progress_callback=self.upload_progress_callback)
+        except Exception as e:
+            print(f"Error subiendo {file_path}: {e}")
 
         return response
-
-    def log_video(self, title, clip_filename=None):
-        log_file = f"E:\CODING\Python\SocialMediaAutomation\web_app/backend\youtube_automation\logs/{self.account_name}_uploaded_videos.json"
-        
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-
-        # Cargar los datos existentes
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                data = json.load(f)
-                f.close()
-        else:
-            data = {"videos": []}
-
-        # Añadir el nuevo video con información del clip
-        video_entry = {
-            "title": title,
-            "upload_time": datetime.now().isoformat()
-        }
-        
-        if clip_filename:
-            video_entry["clip_file"] = clip_filename
-            
-        data["videos"].append(video_entry)
-
-        # Guardar de nuevo en el archivo
-        with open(log_file, 'w') as f:
-            json.dump(data, f, indent=4)
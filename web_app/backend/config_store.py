@@ -0,0 +1,80 @@
+import copy
+import json
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, Optional
+
+
+class ConfigStore:
+    """
+    Parsed config.json kept in memory
+
+    get() returns the shared snapshot after a cheap os.stat check (mtime, inode and
+    size): the file is only parsed again when it changed on disk, e.g. edited by
+    hand or replaced by a restore. The snapshot must be treated as read-only;
+    callers that modify the config take a private copy with edit() and hand it
+    to save(), which writes a temporary file and renames it over config.json so
+    a crash mid-write never leaves a truncated file behind.
+    """
+
+    def __init__(self, path: str, default_factory: Optional[Callable[[], Dict]] = None):
+        self.path = path
+        self.default_factory = default_factory or dict
+        self.lock = threading.RLock()
+        self.snapshot = None
+        self.signature = None
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+    def get(self) -> Dict:
+        """Current config (shared snapshot, do not modify)"""
+        signature = self._stat_signature()
+        if self.snapshot is not None and signature == self.signature:
+            return self.snapshot
+
+        with self.lock:
+            signature = self._stat_signature()
+            if self.snapshot is not None and signature == self.signature:
+                return self.snapshot
+            if signature is None:
+                # No config yet: create the default one
+                self.save(self.default_factory())
+                return self.snapshot
+            try:
+                with open(self.path, 'r') as f:
+                    self.snapshot = json.load(f)
+                self.signature = signature
+            except (OSError, ValueError) as e:
+                print(f"Error loading config: {e}")
+                if self.snapshot is None:
+                    return {}
+            return self.snapshot
+
+    def edit(self) -> Dict:
+        """Private copy of the config to modify and pass to save()"""
+        return copy.deepcopy(self.get())
+
+    def save(self, config: Dict):
+        """Atomically replace config.json and the in-memory snapshot"""
+        with self.lock:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(config, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self.snapshot = config
+            self.signature = self._stat_signature()
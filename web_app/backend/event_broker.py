@@ -0,0 +1,44 @@
+import asyncio
+import json
+
+
+class EventBroker:
+    """
+    Fan-out of server events (task progress, scheduler state, upload results) to
+    the connected event streams
+
+    publish() may be called from any thread (job workers, scheduler threads); the
+    events are handed to the event loop, which puts them on every subscriber's
+    queue. Each queue is bounded: a client that stops reading loses its oldest
+    events instead of growing memory.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.loop = None
+
+    def bind(self, loop):
+        """Attach the broker to the event loop serving the streams"""
+        self.loop = loop
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, event_type: str, data: dict):
+        """Send an event to every subscriber (thread-safe, never blocks)"""
+        if self.loop is None or self.loop.is_closed() or not self.subscribers:
+            return
+        message = f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+        self.loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message: str):
+        for queue in list(self.subscribers):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
@@ -0,0 +1,61 @@
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobExecutor:
+    """
+    Runs blocking jobs (clip rendering, downloads, uploads) off the event loop
+
+    Jobs go to one of three pools so no kind of job holds back the others:
+    - render: CPU-bound clip creation. Each render job already spreads ffmpeg over
+      every core, so only a few run at once.
+    - download: source downloads, which can take hours for long videos.
+    - upload: manual and scheduled uploads, limited by maxConcurrentUploads, so a
+      due upload never waits behind downloads.
+    """
+
+    def __init__(self, max_uploads=3, max_downloads=None, max_renders=None):
+        cpu_count = os.cpu_count() or 1
+        self.max_renders = max_renders or max(1, cpu_count // 4)
+        self.max_uploads = max(1, max_uploads)
+        self.max_downloads = max(1, max_downloads or max_uploads)
+        self.render_pool = ThreadPoolExecutor(max_workers=self.max_renders, thread_name_prefix="render")
+        self.download_pool = ThreadPoolExecutor(max_workers=self.max_downloads, thread_name_prefix="download")
+        self.upload_pool = ThreadPoolExecutor(max_workers=self.max_uploads, thread_name_prefix="upload")
+        print(f"Job executor started ({self.max_renders} render / {self.max_downloads} download / "
+              f"{self.max_uploads} upload workers)")
+
+    def submit_render(self, fn, *args, **kwargs):
+        """Queue a CPU-bound job"""
+        return self._submit(self.render_pool, fn, *args, **kwargs)
+
+    def submit_download(self, fn, *args, **kwargs):
+        """Queue a download job"""
+        return self._submit(self.download_pool, fn, *args, **kwargs)
+
+    def submit_upload(self, fn, *args, **kwargs):
+        """Queue an upload job"""
+        return self._submit(self.upload_pool, fn, *args, **kwargs)
+
+    @staticmethod
+    def _submit(pool, fn, *args, **kwargs):
+        future = pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(JobExecutor._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future):
+        """Jobs report their own errors; this only catches what escapes them"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error:
+            print(f"Unhandled error in background job: {error}")
+            traceback.print_exception(type(error), error, error.__traceback__)
+
+    def shutdown(self, wait=False):
+        """Stop accepting jobs and drop the ones still queued"""
+        self.render_pool.shutdown(wait=wait, cancel_futures=True)
+        self.download_pool.shutdown(wait=wait, cancel_futures=True)
+        self.upload_pool.shutdown(wait=wait, cancel_futures=True)
@@ -1,8 +1,8 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 import uvicorn
 import os
 import sys
@@ -10,7 +10,9 @@ import json
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
 import asyncio
+import secrets
 import threading
+import time
 from pathlib import Path
 from contextlib import asynccontextmanager
 
@@ -34,42 +36,57 @@ except ImportError:
         print("Warning: TikTok automation not available")
         TikTokAutomation = None
 
+from core.video_processing import probe_video, plan_clip_segments, render_clips
+from core.source_cache import SourceCache
+from core.clip_store import ClipStore, file_sha256
+from core.clip_inventory import inventory
+
+from config_store import ConfigStore
+
 import json
 
+def default_config():
+    """Configuration created when config.json does not exist yet"""
+    return {
+        "YouTube": {"accounts": {}, "auto_upload": False},
+        "TikTok": {"accounts": {}, "auto_upload": False},
+        "Instagram": {"accounts": {}, "auto_upload": False},
+        "Twitter": {"accounts": {}, "auto_upload": False}
+    }
+
+# Parsed config.json, re-read only when the file changes on disk
+config_store = ConfigStore("config/config.json", default_factory=default_config)
+
 def load_config():
-    """Load configuration from config.json"""
-    try:
-        config_path = "config/config.json"
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                return json.load(f)
-        else:
-            # Create default config if not exists
-            default_config = {
-                "YouTube": {"accounts": {}, "auto_upload": False},
-                "TikTok": {"accounts": {}, "auto_upload": False},
-                "Instagram": {"accounts": {}, "auto_upload": False},
-                "Twitter": {"accounts": {}, "auto_upload": False}
-            }
-            save_config(default_config)
-            return default_config
-    except Exception as e:
-        print(f"Error loading config: {e}")
-        return {}
+    """Current configuration (shared snapshot: use edit_config() to modify it)"""
+    return config_store.get()
+
+def edit_config():
+    """Private copy of the configuration to modify and pass to save_config()"""
+    return config_store.edit()
 
 def save_config(config):
-    """Save configuration to config.json"""
+    """Save configuration to config.json (atomically)"""
     try:
-        config_path = "config/config.json"
-        os.makedirs(os.path.dirname(config_path), exist_ok=True)
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=4)
+        config_store.save(config)
     except Exception as e:
         print(f"Error saving config: {e}")
+        return
+    
+    # Schedules, accounts or auto-upload may have changed: push the new scheduler state
+    if scheduler_service:
+        scheduler_service.update_config(config)
+        for platform_name, platform_config in config.items():
+            if isinstance(platform_config, dict):
+                scheduler_service.publish_state(platform_name)
 
 from models import *
 from auth import verify_token, create_access_token
 from scheduler import SchedulerService
+from job_executor import JobExecutor
+from task_store import TaskStore
+from event_broker import EventBroker
+from upload_receiver import UploadReceiver
 from settings_manager import SettingsManager, BackupManager, NotificationManager, PerformanceMonitor, SecurityManager
 
 # Platform-specific authentication functions
@@ -196,9 +213,16 @@ async def handle_twitter_authentication(account: CreateAccountRequest):
         return False, f"Twitter authentication error: {str(e)}"
 
 # Global variables
-config_data = {}
 scheduler_service = None
-active_tasks = {}
+task_store = None
+event_broker = EventBroker()
+source_cache = None
+clip_store = None
+job_executor = None
+
+# Single-use tickets that open the event stream: ticket -> expiry (time.time())
+event_tickets = {}
+EVENT_TICKET_TTL = 30
 
 # Settings management
 settings_manager = None
@@ -211,7 +235,7 @@ security_manager = None
 async def lifespan(app: FastAPI):
     """Manage application lifespan"""
     # Startup
-    global config_data, scheduler_service, settings_manager, backup_manager, notification_manager, performance_monitor, security_manager
+    global scheduler_service, settings_manager, backup_manager, notification_manager, performance_monitor, security_manager, source_cache, clip_store, job_executor, task_store
     
     # Load configuration
     config_data = load_config()
@@ -223,8 +247,29 @@ async def lifespan(app: FastAPI):
     performance_monitor = PerformanceMonitor(settings_manager)
     security_manager = SecurityManager(settings_manager)
     
-    # Initialize scheduler service
-    scheduler_service = SchedulerService(config_data)
+    # Shared cache of downloaded source videos (size in MB)
+    source_cache = SourceCache("web_app/cache/sources", settings_manager.get_setting('performance', 'cacheSize', 2048))
+    
+    # Rendered clips shared by all accounts (account clip folders hold hard links into it)
+    clip_store = ClipStore("web_app/cache/clips")
+    
+    # Server-sent events are dispatched on this loop; task changes are pushed as they are recorded
+    event_broker.bind(asyncio.get_running_loop())
+    
+    # Persistent registry of background tasks (finished tasks are kept for 3 days, 1000 at most)
+    task_store = TaskStore("web_app/data/tasks.db", on_change=lambda task: event_broker.publish("task", task))
+    
+    # Worker pools for clip rendering, downloads and uploads (keeps blocking work off the event loop)
+    job_executor = JobExecutor(max_uploads=settings_manager.get_setting('general', 'maxConcurrentUploads', 3))
+    
+    # Initialize scheduler service (scheduled uploads run on the upload pool, never behind downloads)
+    scheduler_service = SchedulerService(
+        config_data, max_concurrent_uploads=settings_manager.get_setting('general', 'maxConcurrentUploads', 3),
+        upload_retries=settings_manager.get_setting('general', 'retryAttempts', 3),
+        upload_chunk_size=settings_manager.get_setting('performance', 'uploadChunkSize', 8) * 1024 * 1024
+    )
+    scheduler_service.event_callback = event_broker.publish
+    scheduler_service.submit_upload = job_executor.submit_upload
     
     # Start schedulers for platforms that have auto_upload enabled
     for platform_name, platform_config in config_data.items():
@@ -244,6 +289,10 @@ async def lifespan(app: FastAPI):
     # Shutdown
     if scheduler_service:
         await scheduler_service.stop_all_schedulers()
+    if job_executor:
+        job_executor.shutdown()
+    if task_store:
+        task_store.close()
     print("🛑 Social Media Automation API stopped")
 
 app = FastAPI(
@@ -292,7 +341,7 @@ async def verify_auth(token: HTTPAuthorizationCredentials = Depends(security)):
 async def get_config(token: HTTPAuthorizationCredentials = Depends(security)):
     """Get application configuration"""
     verify_token(token.credentials)
-    return config_data
+    return load_config()
 
 @app.post("/api/config")
 async def save_config_endpoint(
@@ -301,9 +350,7 @@ async def save_config_endpoint(
 ):
     """Save application configuration"""
     verify_token(token.credentials)
-    global config_data
-    config_data = config
-    save_config(config_data)
+    save_config(config)
     return {"message": "Configuration saved successfully"}
 
 # Social Media Platform endpoints
@@ -353,7 +400,7 @@ async def toggle_platform_auto_upload(
     verify_token(token.credentials)
     
     # Load fresh config data to avoid overwriting existing data
-    fresh_config_data = load_config()
+    fresh_config_data = edit_config()
     
     if platform_name not in fresh_config_data:
         fresh_config_data[platform_name] = {"accounts": {}, "auto_upload": False}
@@ -403,26 +450,11 @@ async def get_next_upload_times(
     return scheduler_service.get_next_upload_times(platform_name)
 
 def count_clips_in_folder(folder_path: str) -> int:
-    """Count video clips in a folder"""
-    if not os.path.exists(folder_path):
-        return 0
-    
-    clips_folder = os.path.join(folder_path, "clips")
-    if not os.path.exists(clips_folder):
-        return 0
-    
-    video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv'}
-    clip_count = 0
-    
-    try:
-        for file in os.listdir(clips_folder):
-            if os.path.splitext(file.lower())[1] in video_extensions:
-                clip_count += 1
-    except Exception as e:
-        print(f"Error counting clips in {clips_folder}: {e}")
+    """Count video clips in a folder (from the clip inventory, no directory listing)"""
+    if not folder_path:
         return 0
     
-    return clip_count
+    return inventory.count(os.path.join(folder_path, "clips"))
 
 def calculate_clips_needed_per_week(schedule: dict) -> int:
     """Calculate how many clips are needed per week based on schedule"""
@@ -505,6 +537,7 @@ async def create_account(
     """Create a new account for a platform"""
     verify_token(token.credentials)
     
+    config_data = edit_config()
     if platform_name not in config_data:
         config_data[platform_name] = {"accounts": {}, "auto_upload": False}
     
@@ -571,7 +604,7 @@ async def update_account(
     verify_token(token.credentials)
     
     # Load fresh config data
-    fresh_config_data = load_config()
+    fresh_config_data = edit_config()
     
     if platform_name not in fresh_config_data or account_name not in fresh_config_data[platform_name]["accounts"]:
         raise HTTPException(status_code=404, detail="Account not found")
@@ -608,18 +641,17 @@ async def delete_account(
     verify_token(token.credentials)
     
     # Load fresh config data
-    fresh_config_data = load_config()
+    fresh_config_data = edit_config()
     
     if platform_name not in fresh_config_data or account_name not in fresh_config_data[platform_name]["accounts"]:
         raise HTTPException(status_code=404, detail="Account not found")
     
     account_data = fresh_config_data[platform_name]["accounts"][account_name]
     
-    # Remove clips folder
+    # Remove clips folder (off the event loop: large folders take a while)
     clips_folder = account_data.get("clip_folder", "")
     if clips_folder and os.path.exists(clips_folder):
-        import shutil
-        shutil.rmtree(clips_folder)
+        await asyncio.to_thread(remove_clips_folder, clips_folder)
     
     # Remove account from config
     del fresh_config_data[platform_name]["accounts"][account_name]
@@ -628,76 +660,145 @@ async def delete_account(
     
     return {"message": f"Account {account_name} deleted successfully"}
 
+def remove_clips_folder(clips_folder: str):
+    """Delete an account's clip folder and the stored clips no other account uses"""
+    import shutil
+    shutil.rmtree(clips_folder)
+    clips_dir = os.path.join(clips_folder, "clips")
+    inventory.forget(clips_dir)
+    clip_store.release(clips_dir)
+
 # Content generation endpoints
 @app.post("/api/platforms/{platform_name}/accounts/{account_name}/generate-from-url")
 async def generate_clips_from_url(
     platform_name: str,
     account_name: str,
     request: GenerateClipsFromUrlRequest,
-    background_tasks: BackgroundTasks,
     token: HTTPAuthorizationCredentials = Depends(security)
 ):
     """Generate clips from a YouTube URL"""
     verify_token(token.credentials)
     
+    config_data = load_config()
     if platform_name not in config_data or account_name not in config_data[platform_name]["accounts"]:
         raise HTTPException(status_code=404, detail="Account not found")
     
     account_data = config_data[platform_name]["accounts"][account_name]
-    task_id = f"{platform_name}_{account_name}_{datetime.now().timestamp()}"
+    task_id = task_store.create("generation", platform_name, account_name)
     
-    # Start background task
-    background_tasks.add_task(
+    # Streaming ingest renders while it downloads, so it runs as a render job;
+    # otherwise the download runs as a download job and queues the render itself
+    submit = job_executor.submit_render if request.streaming else job_executor.submit_download
+    submit(
         generate_clips_from_url_task,
         task_id,
         request.url,
         account_data["clip_folder"],
         account_data.get("clip_duration", 57),
-        request.mobile_format
+        request.mobile_format,
+        request.start_time,
+        request.end_time,
+        request.streaming
     )
     
-    active_tasks[task_id] = {"status": "processing", "progress": 0, "message": "Starting..."}
-    
     return {"task_id": task_id, "message": "Clip generation started"}
 
 @app.post("/api/platforms/{platform_name}/accounts/{account_name}/generate-from-file")
 async def generate_clips_from_file(
     platform_name: str,
     account_name: str,
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    mobile_format: bool = Form(True),
+    request: Request,
     token: HTTPAuthorizationCredentials = Depends(security)
 ):
-    """Generate clips from an uploaded file"""
+    """
+    Generate clips from an uploaded file (multipart form: file, mobile_format)
+    The body is parsed as it arrives: the file is written once, straight to
+    web_app/uploads, and an upload over maxFileSize is rejected up front by its
+    Content-Length or as soon as it goes over.
+    """
     verify_token(token.credentials)
     
+    config_data = load_config()
     if platform_name not in config_data or account_name not in config_data[platform_name]["accounts"]:
         raise HTTPException(status_code=404, detail="Account not found")
     
     account_data = config_data[platform_name]["accounts"][account_name]
-    task_id = f"{platform_name}_{account_name}_{datetime.now().timestamp()}"
+    max_file_size = settings_manager.get_setting('performance', 'maxFileSize', 1024) * 1024 * 1024
+    receiver = UploadReceiver("web_app/uploads", max_file_size)
+    upload_path = await receiver.receive(request)
+    mobile_format = receiver.fields.get("mobile_format", "true").strip().lower() in ("true", "1", "yes", "on")
     
-    # Save uploaded file
-    upload_path = f"web_app/uploads/{file.filename}"
-    with open(upload_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    task_id = task_store.create("generation", platform_name, account_name)
     
-    # Start background task
-    background_tasks.add_task(
+    # Queue the render job
+    job_executor.submit_render(
         generate_clips_from_file_task,
         task_id,
         upload_path,
         account_data["clip_folder"],
         account_data.get("clip_duration", 57),
-        mobile_format
+        mobile_format,
+        receiver.sha256(),
+        receiver.filename
     )
     
-    active_tasks[task_id] = {"status": "processing", "progress": 0, "message": "Starting..."}
-    
     return {"task_id": task_id, "message": "Clip generation started"}
 
+@app.post("/api/events/ticket")
+async def create_event_ticket(token: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Ticket to open the event stream
+    EventSource can't send headers, so it authenticates with this short-lived,
+    single-use ticket in the query string instead of the JWT (URLs end up in logs).
+    """
+    verify_token(token.credentials)
+    
+    now = time.time()
+    for ticket, expiry in list(event_tickets.items()):
+        if expiry < now:
+            del event_tickets[ticket]
+    ticket = secrets.token_urlsafe(32)
+    event_tickets[ticket] = now + EVENT_TICKET_TTL
+    return {"ticket": ticket, "expires_in": EVENT_TICKET_TTL}
+
+@app.get("/api/events")
+async def stream_events(ticket: str):
+    """
+    Server-sent event stream of task progress ("task"), scheduler state ("scheduler")
+    and upload results ("upload"), opened with a ticket from /api/events/ticket
+    """
+    expiry = event_tickets.pop(ticket, None)
+    if expiry is None or expiry < time.time():
+        raise HTTPException(status_code=401, detail="Invalid or expired event ticket")
+    queue = event_broker.subscribe()
+    
+    async def event_stream():
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+        finally:
+            event_broker.unsubscribe(queue)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/tasks")
+async def get_task_history(
+    platform: Optional[str] = None,
+    account: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 100,
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Get the most recent tasks, optionally filtered by platform, account and status"""
+    verify_token(token.credentials)
+    
+    return task_store.history(platform, account, status, min(max(limit, 1), 500))
+
 @app.get("/api/tasks/{task_id}")
 async def get_task_status(
     task_id: str,
@@ -706,30 +807,31 @@ async def get_task_status(
     """Get task status and progress"""
     verify_token(token.credentials)
     
-    if task_id not in active_tasks:
+    task = task_store.get(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    return active_tasks[task_id]
+    return task
 
 # Upload endpoint
 @app.post("/api/platforms/{platform_name}/accounts/{account_name}/upload")
 async def upload_content(
     platform_name: str,
     account_name: str,
-    background_tasks: BackgroundTasks,
     token: HTTPAuthorizationCredentials = Depends(security)
 ):
     """Upload content for an account"""
     verify_token(token.credentials)
     
+    config_data = load_config()
     if platform_name not in config_data or account_name not in config_data[platform_name]["accounts"]:
         raise HTTPException(status_code=404, detail="Account not found")
     
     account_data = config_data[platform_name]["accounts"][account_name]
-    task_id = f"upload_{platform_name}_{account_name}_{datetime.now().timestamp()}"
+    task_id = task_store.create("upload", platform_name, account_name, "Starting upload...")
     
-    # Start background upload task
-    background_tasks.add_task(
+    # Queue the upload on the upload pool
+    job_executor.submit_upload(
         upload_content_task,
         task_id,
         platform_name,
@@ -737,10 +839,48 @@ async def upload_content(
         account_data
     )
     
-    active_tasks[task_id] = {"status": "processing", "progress": 0, "message": "Starting upload..."}
-    
     return {"task_id": task_id, "message": "Upload started"}
 
+def account_upload_ledger(platform_name: str, account_name: str):
+    """Upload ledger and queue of an existing account (404 otherwise)"""
+    config_data = load_config()
+    if platform_name not in config_data or account_name not in config_data[platform_name].get("accounts", {}):
+        raise HTTPException(status_code=404, detail="Account not found")
+    
+    if platform_name == "YouTube":
+        return YouTubeAutomation(account_name=account_name).upload_ledger()
+    if platform_name == "TikTok":
+        return TikTokAutomation(account_name=account_name).upload_ledger()
+    raise HTTPException(status_code=400, detail=f"Uploads not implemented for {platform_name}")
+
+@app.get("/api/platforms/{platform_name}/accounts/{account_name}/upload-queue")
+async def get_upload_queue(
+    platform_name: str,
+    account_name: str,
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Clips of the upload queue by state, clips held after an interrupted upload and recent uploads"""
+    verify_token(token.credentials)
+    
+    ledger = account_upload_ledger(platform_name, account_name)
+    return ledger.queue_state()
+
+@app.post("/api/platforms/{platform_name}/accounts/{account_name}/upload-queue/{clip_number}/requeue")
+async def requeue_clip(
+    platform_name: str,
+    account_name: str,
+    clip_number: int,
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Put a held clip back in the upload queue (after checking it didn't reach the platform)"""
+    verify_token(token.credentials)
+    
+    ledger = account_upload_ledger(platform_name, account_name)
+    if not ledger.requeue(clip_number):
+        raise HTTPException(status_code=404, detail="Clip is not held")
+    
+    return {"message": f"clip_{clip_number}.mp4 queued again"}
+
 # Re-authentication endpoint
 @app.post("/api/platforms/{platform_name}/accounts/{account_name}/reauth", response_model=ReauthResponse)
 async def reauthenticate_account(
@@ -752,7 +892,7 @@ async def reauthenticate_account(
     """Re-authenticate an existing account"""
     verify_token(token.credentials)
     
-    config_data = load_config()
+    config_data = edit_config()
     
     if platform_name not in config_data:
         raise HTTPException(status_code=404, detail="Platform not found")
@@ -829,7 +969,7 @@ async def get_dashboard_stats(token: HTTPAuthorizationCredentials = Depends(secu
     active_accounts = 0
     platforms_active = 0
     
-    for platform_name, platform_data in config_data.items():
+    for platform_name, platform_data in load_config().items():
         if isinstance(platform_data, dict) and "accounts" in platform_data:
             accounts = platform_data["accounts"]
             total_accounts += len(accounts)
@@ -845,168 +985,187 @@ async def get_dashboard_stats(token: HTTPAuthorizationCredentials = Depends(secu
         "total_platforms": 4
     }
 
-def convert_clip_to_mobile_format(clip, crop_position='center'):
-    """
-    Converts a clip to mobile format (9:16 aspect ratio)
-    Args:
-        clip: MoviePy VideoFileClip object
-        crop_position: Position of cropping ('center', 'top', 'bottom')
-    Returns:
-        Converted clip optimized for mobile
-    """
-    # Target dimensions for mobile (9:16) - YouTube Shorts optimized
-    target_width = 1080
-    target_height = 1920
-    target_ratio = target_height / target_width
-    
-    # Get current dimensions
-    current_width = clip.w
-    current_height = clip.h
-    current_ratio = current_height / current_width
-    
-    if current_ratio < target_ratio:
-        # Video is wider than mobile format - crop horizontally
-        new_width = int(current_height / target_ratio)
+# Background tasks
+def generate_clips_from_url_task(task_id: str, url: str, output_folder: str, clip_duration: int, mobile_format: bool = True,
+                                 start_time: Optional[float] = None, end_time: Optional[float] = None,
+                                 streaming: bool = False):
+    """Background task for generating clips from URL"""
+    yta = None
+    try:
+        task_store.update(task_id, "processing", 10, "Downloading video and audio...")
+        
+        def report_download_progress(fraction):
+            task_store.update(
+                task_id,
+                "processing",
+                10 + int(fraction * 60),
+                f"Downloading video and audio... {int(fraction * 100)}%"
+            )
         
-        if crop_position == 'left':
-            x_start = 0
-        elif crop_position == 'right':
-            x_start = current_width - new_width
-        else:  # center
-            x_center = current_width / 2
-            x_start = int(x_center - new_width / 2)
+        yta = YouTubeAutomation(url=url, output_path=output_folder)
+        yta.progress_callback = report_download_progress
+        yta.download_bandwidth = settings_manager.get_setting('performance', 'downloadBandwidth', None)
+        source_cache.max_size_mb = settings_manager.get_setting('performance', 'cacheSize', 2048)
+        yta.source_cache = source_cache
+        yta.clip_store = clip_store
+        # Only download the resolution the clips actually need
+        platform = 'youtube_shorts' if mobile_format else 'youtube_standard'
+        target_size = yta.get_platform_dimensions(platform)
         
-        x_start = max(0, x_start)
-        x_end = min(current_width, x_start + new_width)
+        parallel_processing = settings_manager.get_setting('performance', 'parallelProcessing', True)
         
-        clip = clip.crop(x1=x_start, x2=x_end)
+        if streaming:
+            # Clips land one by one while the rest of the source is still being fetched
+            def report_clip_progress(fraction):
+                task_store.update(
+                    task_id,
+                    "processing",
+                    10 + int(fraction * 85),
+                    f"Creating clips... {int(fraction * 100)}%"
+                )
+            
+            yta.progress_callback = report_clip_progress
+            if not yta.stream_clips(mobile_format=mobile_format, clip_duration=clip_duration, target_size=target_size,
+                                    start_time=start_time, end_time=end_time, parallel_processing=parallel_processing):
+                raise Exception("Video too short to create any clip")
+            task_store.update(task_id, "completed", 100, "Clips generated successfully!")
+            return
         
-    elif current_ratio > target_ratio:
-        # Video is taller than mobile format - crop vertically
-        new_height = int(current_width * target_ratio)
+        # Fetch only the time window that will become clips; fall back to the full download
+        try:
+            window_fetched = yta.download_clip_window(clip_duration, target_size, start_time, end_time)
+        except Exception as e:
+            print(f"Range-limited download failed ({e}), downloading the full video")
+            window_fetched = None
         
-        if crop_position == 'top':
-            y_start = 0
-        elif crop_position == 'bottom':
-            y_start = current_height - new_height
-        else:  # center with slight upward bias
-            y_center = current_height / 2
-            y_offset = current_height * 0.05  # 5% upward for better composition
-            y_start = int(y_center - new_height / 2 - y_offset)
+        if window_fetched is False:
+            raise Exception("Video too short to create any clip")
+        elif window_fetched is None:
+            yta.download_streams(target_size)
+            
+            # final_output_path is already set when the source came from the cache
+            if not yta.final_output_path:
+                task_store.update(task_id, "processing", 70, "Combining video and audio...")
+                yta.combine_video_audio()
         
-        y_start = max(0, y_start)
-        y_end = min(current_height, y_start + new_height)
+        # The download is done: hand the CPU-bound part to the render pool and free this download worker
+        task_store.update(task_id, "processing", 80, "Waiting for a render worker...")
+        # The cached source stays pinned until create_clips_task is done with it
+        job_executor.submit_render(create_clips_task, task_id, yta, mobile_format, clip_duration, parallel_processing)
         
-        clip = clip.crop(y1=y_start, y2=y_end)
-    
-    # Resize to exact target dimensions
-    clip = clip.resize((target_width, target_height))
-    
-    return clip
+    except Exception as e:
+        if yta:
+            yta.release_sources()
+        task_store.update(task_id, "failed", 0, f"Error: {str(e)}")
 
-# Background tasks
-async def generate_clips_from_url_task(task_id: str, url: str, output_folder: str, clip_duration: int, mobile_format: bool = True):
-    """Background task for generating clips from URL"""
+def render_progress_reporter(task_id: str, start: int, end: int):
+    """Map the render stats of a clip job onto the task progress between start and end"""
+    def report(stats):
+        eta = f", ~{int(stats['eta'])}s left" if stats["eta"] is not None else ""
+        task_store.update(
+            task_id,
+            "processing",
+            start + int(stats["fraction"] * (end - start)),
+            f"Creating clips... {stats['clips_done']}/{stats['clip_count']} ({stats['fps']} fps{eta})",
+            details=stats
+        )
+    return report
+
+def create_clips_task(task_id: str, yta: YouTubeAutomation, mobile_format: bool, clip_duration: int, parallel_processing: bool):
+    """Render job for the clips of a downloaded source"""
     try:
-        active_tasks[task_id] = {"status": "processing", "progress": 10, "message": "Downloading video..."}
-        
-        yta = YouTubeAutomation(url=url, output_path=output_folder)
-        yta.download_video()
-        
-        active_tasks[task_id] = {"status": "processing", "progress": 40, "message": "Downloading audio..."}
-        yta.download_audio()
-        
-        active_tasks[task_id] = {"status": "processing", "progress": 70, "message": "Combining video and audio..."}
-        yta.combine_video_audio()
+        task_store.update(task_id, "processing", 80, "Creating clips...")
+        yta.create_clips(mobile_format=mobile_format, clip_duration=clip_duration,
+                         parallel_processing=parallel_processing,
+                         progress_callback=render_progress_reporter(task_id, 80, 99))
         
-        active_tasks[task_id] = {"status": "processing", "progress": 90, "message": "Creating clips..."}
-        yta.create_clips(mobile_format=mobile_format, clip_duration=clip_duration)
-        
-        active_tasks[task_id] = {"status": "completed", "progress": 100, "message": "Clips generated successfully!"}
+        task_store.update(task_id, "completed", 100, "Clips generated successfully!")
         
     except Exception as e:
-        active_tasks[task_id] = {"status": "failed", "progress": 0, "message": f"Error: {str(e)}"}
+        task_store.update(task_id, "failed", 0, f"Error: {str(e)}")
+    finally:
+        yta.release_sources()
 
-async def generate_clips_from_file_task(task_id: str, file_path: str, output_folder: str, clip_duration: int, mobile_format: bool = True):
-    """Background task for generating clips from file"""
+def generate_clips_from_file_task(task_id: str, file_path: str, output_folder: str, clip_duration: int, mobile_format: bool = True, content_hash: Optional[str] = None,
+                                  file_name: Optional[str] = None):
+    """
+    Background task for generating clips from file
+    file_name is the name the file was uploaded with (file_path is a unique temporary name)
+    """
     try:
-        active_tasks[task_id] = {"status": "processing", "progress": 20, "message": "Processing file..."}
+        task_store.update(task_id, "processing", 20, "Processing file...")
         
         import shutil
         
-        # PIL compatibility fix for newer versions
-        try:
-            from PIL import Image
-            # Check if ANTIALIAS exists, if not, use LANCZOS
-            if not hasattr(Image, 'ANTIALIAS'):
-                Image.ANTIALIAS = Image.LANCZOS
-        except ImportError:
-            pass
-            
-        from moviepy.editor import VideoFileClip
-        
-        # Copy file to output folder
-        base_name = os.path.basename(file_path)
+        # Move the uploaded file to the output folder (no second copy of a large upload)
+        base_name = file_name or os.path.basename(file_path)
         final_path = os.path.join(output_folder, f"{os.path.splitext(base_name)[0]}_final.mp4")
-        shutil.copy2(file_path, final_path)
+        os.makedirs(output_folder, exist_ok=True)
+        shutil.move(file_path, final_path)
         
-        active_tasks[task_id] = {"status": "processing", "progress": 60, "message": "Creating clips..."}
+        task_store.update(task_id, "processing", 30, "Creating clips...")
         
-        # Create clips
-        video = VideoFileClip(final_path)
-        total_duration = int(video.duration)
+        # Create clips (the duration is read from the container, no decoding needed)
+        total_duration = int(probe_video(final_path)["duration"])
         
         clips_folder = os.path.join(output_folder, "clips")
         os.makedirs(clips_folder, exist_ok=True)
         
-        number_of_clips = len(os.listdir(clips_folder))
+        number_of_clips = inventory.count(clips_folder)
+        segments = plan_clip_segments(total_duration, clip_duration, skip_first=True,
+                                      number_offset=number_of_clips)
         
-        for start in range(clip_duration, total_duration, clip_duration):
-            end = min(start + clip_duration, total_duration)
-            if (end - start) < clip_duration:
-                break
-            
-            clip = video.subclip(start, end)
-            
-            # Apply mobile format conversion if enabled
-            if mobile_format:
-                clip = convert_clip_to_mobile_format(clip)
-            
-            number = start // clip_duration
-            if number_of_clips > 0:
-                number += number_of_clips
-            
-            out_path = os.path.join(clips_folder, f"clip_{number}.mp4")
-            clip.write_videofile(out_path, codec='libx264', audio_codec='aac')
+        # Remux when the frames are unchanged, encode in a process pool otherwise; clips already
+        # rendered from the same file content (for any account) are linked from the clip store
+        parallel_processing = settings_manager.get_setting('performance', 'parallelProcessing', True)
+        render_clips(final_path, clips_folder, segments, mobile_format=mobile_format,
+                     parallel_processing=parallel_processing, clip_store=clip_store,
+                     source_key=content_hash or file_sha256(final_path),
+                     progress_callback=render_progress_reporter(task_id, 30, 99))
         
-        video.close()
-        
-        # Clean up uploaded file
-        os.remove(file_path)
-        
-        active_tasks[task_id] = {"status": "completed", "progress": 100, "message": "Clips generated successfully!"}
+        task_store.update(task_id, "completed", 100, "Clips generated successfully!")
         
     except Exception as e:
-        active_tasks[task_id] = {"status": "failed", "progress": 0, "message": f"Error: {str(e)}"}
+        task_store.update(task_id, "failed", 0, f"Error: {str(e)}")
 
-async def upload_content_task(task_id: str, platform_name: str, account_name: str, account_data: dict):
+def upload_content_task(task_id: str, platform_name: str, account_name: str, account_data: dict):
     """Background task for uploading content"""
     try:
-        active_tasks[task_id] = {"status": "processing", "progress": 50, "message": "Uploading content..."}
+        task_store.update(task_id, "processing", 50, "Uploading content...")
         
         if platform_name == "YouTube":
             yta = YouTubeAutomation(acc_data=account_data, account_name=account_name)
-            yta.upload_and_log_short()
+            # Chunked, resumable upload: failed chunks are retried with backoff
+            yta.upload_chunk_size = settings_manager.get_setting('performance', 'uploadChunkSize', 8) * 1024 * 1024
+            yta.upload_retries = settings_manager.get_setting('general', 'retryAttempts', 3)
+            yta.upload_progress_callback = lambda sent, total: task_store.update(
+                task_id, "processing", 50 + int(49 * sent / total) if total else 50,
+                f"Uploading content... {sent / (1024 * 1024):.1f}/{total / (1024 * 1024):.1f} MB"
+            )
+            uploaded = yta.upload_and_log_short()
         elif platform_name == "TikTok":
             tta = TikTokAutomation(acc_data=account_data, account_name=account_name)
-            tta.upload_and_log_short()
+            uploaded = tta.upload_and_log_short()
         else:
             raise Exception(f"Upload not implemented for {platform_name}")
         
-        active_tasks[task_id] = {"status": "completed", "progress": 100, "message": "Content uploaded successfully!"}
+        # True: uploaded, False: the upload failed, None: no clip to upload
+        if uploaded is None:
+            task_store.update(task_id, "completed", 100, "Nothing uploaded: no clips available")
+            status, message = "skipped", "Nothing uploaded: no clips available"
+        elif uploaded:
+            task_store.update(task_id, "completed", 100, "Content uploaded successfully!")
+            status, message = "completed", "Content uploaded successfully!"
+        else:
+            task_store.update(task_id, "failed", 0, "Upload failed")
+            status, message = "failed", "Upload failed"
+        event_broker.publish("upload", {"platform": platform_name, "account": account_name, "status": status,
+                                        "message": message})
         
     except Exception as e:
-        active_tasks[task_id] = {"status": "failed", "progress": 0, "message": f"Error: {str(e)}"}
+        task_store.update(task_id, "failed", 0, f"Error: {str(e)}")
+        event_broker.publish("upload", {"platform": platform_name, "account": account_name, "status": "failed",
+                                        "message": f"Error: {str(e)}"})
 
 # Settings endpoints
 @app.get("/api/settings")
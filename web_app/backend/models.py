@@ -70,6 +70,11 @@ class UpdateAccountRequest(BaseModel):
 class GenerateClipsFromUrlRequest(BaseModel):
     url: str
     mobile_format: bool = True
+    # Optional source range in seconds (e.g. to skip an intro)
+    start_time: Optional[float] = None
+    end_time: Optional[float] = None
+    # Render each clip straight from the remote streams as soon as its range arrives
+    streaming: bool = False
 
 class TaskStatus(BaseModel):
     task_id: str
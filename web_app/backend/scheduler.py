@@ -1,5 +1,9 @@
-import asyncio
+import bisect
+import heapq
+import itertools
 import threading
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Dict, List
 import json
@@ -15,151 +19,314 @@ try:
 except ImportError:
     from core.tiktok_automation import TikTokAutomation
 
+# Longest single wait of the scheduler thread (seconds)
+MAX_SLEEP = 300
+# Wait after an unexpected error in the scheduler thread before trying again (seconds)
+ERROR_DELAY = 5
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+MINUTES_PER_WEEK = 7 * 24 * 60
+
+
+def compile_schedule(schedule: Dict[str, List[str]]) -> List[int]:
+    """Sorted minutes of the week (Monday 00:00 = 0) of a {"Monday": ["HH:MM", ...], ...} schedule"""
+    minutes = set()
+    if not isinstance(schedule, dict):
+        # Missing or malformed ("schedule": null) schedules have no slots
+        return []
+    for day_index, day in enumerate(DAYS):
+        for time_str in schedule.get(day) or []:
+            try:
+                hour, minute = map(int, time_str.split(":"))
+            except (ValueError, AttributeError):
+                continue
+            if 0 <= hour < 24 and 0 <= minute < 60:
+                minutes.add(day_index * 1440 + hour * 60 + minute)
+    return sorted(minutes)
+
+
+def next_slot(slots: List[int], start: datetime):
+    """First slot at or after start (to the minute), looking a whole week ahead; None if slots is empty"""
+    if not slots:
+        return None
+    start = start.replace(second=0, microsecond=0)
+    minute_of_week = start.weekday() * 1440 + start.hour * 60 + start.minute
+    index = bisect.bisect_left(slots, minute_of_week)
+    target = slots[index] if index < len(slots) else slots[0] + MINUTES_PER_WEEK
+    return start + timedelta(minutes=target - minute_of_week)
+
+
 class SchedulerService:
-    def __init__(self, config_data: Dict):
+    """
+    Runs the scheduled uploads of every platform from a single thread
+
+    Schedules are compiled once into sorted minute-of-week lists, so an account's
+    next slot (up to a week ahead) is a binary search. Each scheduled account has
+    one entry (due time, platform, account) in a heap.
+    The thread sleeps on a condition until the earliest entry is due (or until the
+    heap changes), hands the upload to a worker and pushes the account's next slot.
+    Starting or stopping a platform and config changes only reschedule the
+    accounts affected; replaced entries stay in the heap and are skipped when they
+    surface.
+
+    Uploads run on submit_upload (the upload pool, capped by
+    general.maxConcurrentUploads), at most one per account and at most
+    max_concurrent_uploads per platform (overridable with the platform's
+    "max_concurrent_uploads" in config.json). Due uploads over a cap wait, in
+    slot order, until one finishes.
+    """
+
+    def __init__(self, config_data: Dict, max_concurrent_uploads: int = 3, upload_retries: int = 3,
+                 upload_chunk_size: int = None):
         self.config_data = config_data
-        self.stop_events = {}
-        self.scheduler_threads = {}
+        self.max_concurrent_uploads = max(1, max_concurrent_uploads)
+        self.upload_retries = upload_retries
+        self.upload_chunk_size = upload_chunk_size
+        self.running_platforms = set()
+        self.heap = []
+        self.entries = {}  # (platform, account) -> sequence of its live heap entry
+        self.last_slots = {}  # (platform, account) -> last slot uploaded (never fired twice)
+        self.compiled = {}  # (platform, account) -> (schedule it was compiled from, slots)
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.thread = None
+        self.waiting = []  # (platform, account) due but held back by a concurrency cap, in slot order
+        self.uploading = set()
+        self.platform_uploads = Counter()
+        # Runs an upload job (e.g. JobExecutor.submit_upload); a thread per upload if not set
+        self.submit_upload = None
+        # Called with (event_type, data) when the scheduler state changes or an upload finishes
+        self.event_callback = None
     
     def update_config(self, new_config_data: Dict):
-        """Update the configuration data"""
-        self.config_data = new_config_data
+        """Update the configuration data and reschedule the accounts whose settings changed"""
+        with self.condition:
+            old_config_data = self.config_data
+            self.config_data = new_config_data
+            if new_config_data is old_config_data:
+                return
+            for platform_name in self.running_platforms:
+                old_accounts = old_config_data.get(platform_name, {}).get("accounts", {})
+                new_accounts = new_config_data.get(platform_name, {}).get("accounts", {})
+                for account_name in old_accounts.keys() | new_accounts.keys():
+                    if old_accounts.get(account_name) != new_accounts.get(account_name):
+                        self._schedule_account(platform_name, account_name)
         
     async def start_platform_scheduler(self, platform_name: str):
         """Start scheduler for a specific platform"""
-        print(f"DEBUG: Attempting to start scheduler for {platform_name}")
-        print(f"DEBUG: Current scheduler_threads: {list(self.scheduler_threads.keys())}")
-        
-        if platform_name in self.scheduler_threads:
-            print(f"Scheduler already running for {platform_name}")
-            return
-        
-        # Create stop event
-        stop_event = threading.Event()
-        self.stop_events[platform_name] = stop_event
-        
-        # Start scheduler thread
-        scheduler_thread = threading.Thread(
-            target=self._scheduler_loop,
-            args=(platform_name, stop_event),
-            daemon=True
-        )
-        scheduler_thread.start()
+        with self.condition:
+            if platform_name in self.running_platforms:
+                print(f"Scheduler already running for {platform_name}")
+                return
+
+            self.running_platforms.add(platform_name)
+            for account_name in self.config_data.get(platform_name, {}).get("accounts", {}):
+                self._schedule_account(platform_name, account_name)
+
+            if self.thread is None or not self.thread.is_alive():
+                self.stopping = False
+                self.thread = threading.Thread(target=self._scheduler_loop, name="scheduler", daemon=True)
+                self.thread.start()
         
-        self.scheduler_threads[platform_name] = scheduler_thread
         print(f"Started scheduler for {platform_name}")
+        self.publish_state(platform_name)
         
     async def stop_platform_scheduler(self, platform_name: str):
         """Stop scheduler for a specific platform"""
-        if platform_name in self.stop_events:
-            self.stop_events[platform_name].set()
-            
-        if platform_name in self.scheduler_threads:
-            self.scheduler_threads[platform_name].join(timeout=5)
-            del self.scheduler_threads[platform_name]
-            
-        if platform_name in self.stop_events:
-            del self.stop_events[platform_name]
+        with self.condition:
+            self.running_platforms.discard(platform_name)
+            for key in [key for key in self.entries if key[0] == platform_name]:
+                del self.entries[key]
+            self.condition.notify()
             
         print(f"Stopped scheduler for {platform_name}")
+        self.publish_state(platform_name)
         
     async def stop_all_schedulers(self):
         """Stop all active schedulers"""
-        for platform_name in list(self.stop_events.keys()):
+        for platform_name in list(self.running_platforms):
             await self.stop_platform_scheduler(platform_name)
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def _schedule_account(self, platform_name: str, account_name: str, after: datetime = None):
+        """
+        Push the next slot of an account, replacing its current entry (called with self.condition held)
+        Inactive or unauthenticated accounts are just dropped from the schedule.
+        """
+        key = (platform_name, account_name)
+        self.entries.pop(key, None)
+        after = after or self.last_slots.get(key)
+        account_data = self.config_data.get(platform_name, {}).get("accounts", {}).get(account_name)
+        if (platform_name not in self.running_platforms or not account_data
+                or not account_data.get("active", False) or not account_data.get("authenticated", False)):
+            return
+
+        due = self._get_next_upload_time(self._slots(key, account_data), after)
+        if due is None:
+            # Empty schedule: the account is scheduled again when its config changes
+            return
+
+        sequence = next(self.sequence)
+        self.entries[key] = sequence
+        heapq.heappush(self.heap, (due.timestamp(), sequence, platform_name, account_name, due))
+        self.condition.notify()
             
-    def _scheduler_loop(self, platform_name: str, stop_event: threading.Event):
-        """Main scheduler loop for a platform"""
-        while not stop_event.is_set():
-            try:
-                platform_config = self.config_data.get(platform_name, {})
-                accounts = platform_config.get("accounts", {})
-                
-                for account_name, account_data in accounts.items():
-                    if stop_event.is_set():
-                        break
-                        
-                    # Check if account is active and authenticated
-                    if not account_data.get("active", False):
+    def _scheduler_loop(self):
+        """Sleep until the earliest slot is due, dispatch its upload, reschedule that account"""
+        with self.condition:
+            while not self.stopping:
+                key = None
+                try:
+                    self._dispatch_waiting()
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+
+                    due_timestamp, sequence, platform_name, account_name, due = self.heap[0]
+                    key = (platform_name, account_name)
+                    if self.entries.get(key) != sequence:
+                        # Replaced by a newer entry (or the platform was stopped)
+                        heapq.heappop(self.heap)
                         continue
-                    if not account_data.get("authenticated", False):
+
+                    delay = due_timestamp - time.time()
+                    if delay > 0:
+                        # Capped so a change of the system clock is noticed
+                        self.condition.wait(min(delay, MAX_SLEEP))
                         continue
-                    
-                    # Check schedule
-                    schedule = account_data.get("schedule", {})
-                    next_upload_time = self._get_next_upload_time(schedule)
-                    
-                    if next_upload_time and datetime.now() >= next_upload_time:
-                        print(f"Time to upload for {platform_name} account {account_name}")
-                        self._upload_for_account(platform_name, account_name, account_data)
-                        
-                # Sleep for 60 seconds before checking again
-                stop_event.wait(60)
-                
-            except Exception as e:
-                print(f"Error in scheduler loop for {platform_name}: {e}")
-                stop_event.wait(60)  # Wait before retrying
-                
-    def _get_next_upload_time(self, schedule: Dict[str, List[str]]):
-        """Get the next upload time from schedule"""
-        now = datetime.now()
-        today_str = now.strftime("%A")
-        
-        # Remove seconds and microseconds for comparison
-        now = now.replace(second=0, microsecond=0)
-        
-        # Check today's schedule
-        today_times = schedule.get(today_str, [])
-        for time_str in sorted(today_times):
-            try:
-                hour, minute = map(int, time_str.split(":"))
-                scheduled_time = now.replace(hour=hour, minute=minute)
-                if scheduled_time >= now:
-                    return scheduled_time
-            except (ValueError, IndexError):
+
+                    heapq.heappop(self.heap)
+                    del self.entries[key]
+                    self.last_slots[key] = due
+                    print(f"Time to upload for {platform_name} account {account_name}")
+                    if key not in self.waiting:
+                        self.waiting.append(key)
+                    self._schedule_account(platform_name, account_name)
+                except Exception as e:
+                    # A bad account must not stop the thread: its entry is dropped (a stale heap
+                    # entry is skipped) and it is scheduled again when its config changes
+                    if key is not None:
+                        self.entries.pop(key, None)
+                        print(f"Scheduler error for {key[0]} account {key[1]}, dropped from the schedule: {e}")
+                    else:
+                        print(f"Scheduler error: {e}")
+                    self.condition.wait(ERROR_DELAY)
+
+    def _platform_limit(self, platform_name: str) -> int:
+        limit = self.config_data.get(platform_name, {}).get("max_concurrent_uploads")
+        return max(1, limit) if isinstance(limit, int) else self.max_concurrent_uploads
+
+    def _dispatch_waiting(self):
+        """Start the due uploads that fit the per-account and per-platform caps (called with self.condition held)"""
+        still_waiting = []
+        for key in self.waiting:
+            platform_name, account_name = key
+            account_data = self.config_data.get(platform_name, {}).get("accounts", {}).get(account_name)
+            if platform_name not in self.running_platforms or not account_data:
                 continue
-        
-        # Check tomorrow's schedule
-        tomorrow = now + timedelta(days=1)
-        tomorrow_str = tomorrow.strftime("%A")
-        tomorrow_times = schedule.get(tomorrow_str, [])
-        
-        if tomorrow_times:
+            if key in self.uploading or self.platform_uploads[platform_name] >= self._platform_limit(platform_name):
+                still_waiting.append(key)
+                continue
+
+            self.uploading.add(key)
+            self.platform_uploads[platform_name] += 1
             try:
-                hour, minute = map(int, tomorrow_times[0].split(":"))
-                next_time = tomorrow.replace(hour=hour, minute=minute)
-                return next_time
-            except (ValueError, IndexError):
-                pass
-        
-        return None
+                if self.submit_upload:
+                    self.submit_upload(self._run_upload, platform_name, account_name, account_data)
+                else:
+                    threading.Thread(target=self._run_upload, args=(platform_name, account_name, account_data),
+                                     name=f"upload-{account_name}", daemon=True).start()
+            except Exception as e:
+                # e.g. the executor is shutting down: this slot is skipped, the next one is already scheduled
+                print(f"Could not start the upload for {platform_name} account {account_name}: {e}")
+                self.uploading.discard(key)
+                self.platform_uploads[platform_name] -= 1
+        self.waiting = still_waiting
+
+    def _run_upload(self, platform_name: str, account_name: str, account_data: dict):
+        try:
+            self._upload_for_account(platform_name, account_name, account_data)
+        finally:
+            with self.condition:
+                self.uploading.discard((platform_name, account_name))
+                self.platform_uploads[platform_name] -= 1
+                self.condition.notify()
+                
+    def _slots(self, key, account_data: dict) -> List[int]:
+        """Compiled schedule of an account (compiled again only when its schedule is replaced)"""
+        schedule = account_data.get("schedule", {})
+        cached = self.compiled.get(key)
+        if cached is None or cached[0] is not schedule:
+            cached = (schedule, compile_schedule(schedule))
+            self.compiled[key] = cached
+        return cached[1]
+
+    def _get_next_upload_time(self, slots: List[int], after: datetime = None, now: datetime = None):
+        """
+        Get the next upload time from a compiled schedule
+        The first slot from the current minute on, and strictly later than `after`
+        (the last slot uploaded) when given.
+        """
+        start = now or datetime.now()
+        if after is not None and after + timedelta(minutes=1) > start:
+            start = after + timedelta(minutes=1)
+        return next_slot(slots, start)
     
     def _upload_for_account(self, platform_name: str, account_name: str, account_data: dict):
         """Upload content for an account"""
         try:
             if platform_name == "YouTube":
                 yta = YouTubeAutomation(acc_data=account_data, account_name=account_name)
-                yta.upload_and_log_short()
+                yta.upload_retries = self.upload_retries
+                if self.upload_chunk_size:
+                    yta.upload_chunk_size = self.upload_chunk_size
+                uploaded = yta.upload_and_log_short()
             elif platform_name == "TikTok":
                 tta = TikTokAutomation(acc_data=account_data, account_name=account_name)
-                tta.upload_and_log_short()
+                uploaded = tta.upload_and_log_short()
             else:
                 print(f"Upload not implemented for {platform_name}")
+                return
+            # True: uploaded, False: the upload failed, None: no clip to upload
+            if uploaded is None:
+                status, message = "skipped", "Scheduled upload skipped: no clips available"
+            elif uploaded:
+                status, message = "completed", "Scheduled upload completed"
+            else:
+                status, message = "failed", "Scheduled upload failed"
+            self._publish("upload", {"platform": platform_name, "account": account_name, "status": status,
+                                     "message": message})
                 
         except Exception as e:
             print(f"Error uploading for {platform_name} account {account_name}: {e}")
+            self._publish("upload", {"platform": platform_name, "account": account_name, "status": "failed",
+                                     "message": f"Scheduled upload failed: {e}"})
+        finally:
+            self.publish_state(platform_name)
+
+    def _publish(self, event_type: str, data: dict):
+        if self.event_callback:
+            self.event_callback(event_type, data)
+
+    def publish_state(self, platform_name: str):
+        """Push the scheduler status and next upload times of a platform to the event stream"""
+        if self.event_callback:
+            self._publish("scheduler", {
+                "platform_name": platform_name,
+                "status": self.get_scheduler_status(platform_name),
+                "next_uploads": self.get_next_upload_times(platform_name)
+            })
 
     def get_scheduler_status(self, platform_name: str) -> dict:
         """Get scheduler status for a platform"""
-        is_running = platform_name in self.scheduler_threads
+        is_running = platform_name in self.running_platforms
         auto_upload = self.config_data.get(platform_name, {}).get("auto_upload", False)
         
-        print(f"DEBUG: Scheduler status for {platform_name}:")
-        print(f"  - scheduler_threads: {list(self.scheduler_threads.keys())}")
-        print(f"  - is_running: {is_running}")
-        print(f"  - auto_upload: {auto_upload}")
-        print(f"  - platform_name in threads: {platform_name in self.scheduler_threads}")
-        
         return {
             "platform_name": platform_name,
             "is_running": is_running,
@@ -171,15 +338,17 @@ class SchedulerService:
         platform_config = self.config_data.get(platform_name, {})
         accounts = platform_config.get("accounts", {})
         
+        # One clock reading and one binary search per account over its compiled schedule
+        now = datetime.now()
         upload_times = {}
         for account_name, account_data in accounts.items():
             if account_data.get("active", False) and account_data.get("authenticated", False):
-                schedule = account_data.get("schedule", {})
-                next_time = self._get_next_upload_time(schedule)
+                key = (platform_name, account_name)
+                next_time = self._get_next_upload_time(self._slots(key, account_data), self.last_slots.get(key), now)
                 
                 upload_times[account_name] = {
                     "next_upload": next_time.isoformat() if next_time else None,
-                    "time_remaining": self._get_time_remaining(next_time) if next_time else None,
+                    "time_remaining": self._get_time_remaining(next_time, now) if next_time else None,
                     "active": True
                 }
             else:
@@ -191,12 +360,12 @@ class SchedulerService:
         
         return upload_times
     
-    def _get_time_remaining(self, next_time: datetime) -> str:
+    def _get_time_remaining(self, next_time: datetime, now: datetime = None) -> str:
         """Get human readable time remaining until next upload"""
         if not next_time:
             return None
         
-        now = datetime.now()
+        now = now or datetime.now()
         if next_time <= now:
             return "Ready to upload"
         
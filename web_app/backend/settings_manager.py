@@ -52,6 +52,7 @@ class SettingsManager:
             "performance": {
                 "uploadBandwidth": 10,
                 "downloadBandwidth": 50,
+                "uploadChunkSize": 8,
                 "maxFileSize": 1024,
                 "compressionQuality": 85,
                 "parallelProcessing": True,
@@ -152,7 +153,8 @@ class BackupManager:
                 self._add_to_zip(zipf, "tiktok_automation/account_config/", ["*.json"])
                 
                 # Backup logs
-                self._add_to_zip(zipf, "youtube_automation/logs/", ["*.json"])
+                self._add_to_zip(zipf, "youtube_automation/logs/", ["*.json", "*.db"])
+                self._add_to_zip(zipf, "tiktok_automation/logs/", ["*.json", "*.db"])
                 self._add_to_zip(zipf, "web_app/logs/", ["*.log", "*.json"])
                 
                 # Backup video clips if requested
@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class TaskStore:
+    """
+    Registry of background tasks backed by SQLite
+
+    Running tasks are also kept in memory, so the frequent progress updates of a
+    download or render don't each hit the database; they are written through on
+    status changes and at most every `flush_interval` seconds. Finished tasks only
+    live in the database, which keeps at most `max_finished` of them for `ttl_hours`
+    (the oldest are dropped first), so memory stays flat on a long-running server.
+    on_change is called with a copy of the task every time it is written.
+    """
+
+    def __init__(self, db_path="web_app/data/tasks.db", max_finished=1000, ttl_hours=72, flush_interval=1.0,
+                 on_change=None):
+        self.db_path = db_path
+        self.max_finished = max_finished
+        self.ttl_seconds = ttl_hours * 3600
+        self.flush_interval = flush_interval
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        self.running = {}
+        self.last_flush = {}
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._create_schema()
+        self._fail_interrupted()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    platform TEXT,
+                    account TEXT,
+                    status TEXT NOT NULL,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    message TEXT,
+                    details TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            columns = [row["name"] for row in self.conn.execute("PRAGMA table_info(tasks)")]
+            if "details" not in columns:
+                self.conn.execute("ALTER TABLE tasks ADD COLUMN details TEXT")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_account ON tasks (platform, account, updated_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, updated_at)")
+
+    def _fail_interrupted(self):
+        """Tasks that were running when the server stopped will never finish"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE tasks SET status = 'failed', progress = 0, message = 'Interrupted by a server restart', "
+                "updated_at = ? WHERE status NOT IN (?, ?)",
+                (time.time(),) + FINISHED_STATUSES
+            )
+
+    def create(self, task_type: str, platform: str = None, account: str = None, message: str = "Starting...") -> str:
+        """Register a new task and return its ID"""
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        task = {
+            "task_id": task_id,
+            "type": task_type,
+            "platform": platform,
+            "account": account,
+            "status": "processing",
+            "progress": 0,
+            "message": message,
+            "details": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        with self.lock:
+            self.running[task_id] = task
+            self._write(task)
+        return task_id
+
+    def update(self, task_id: str, status: str, progress: int, message: str, details: Optional[Dict] = None):
+        """
+        Record the state of a task
+        details holds phase specific measurements (e.g. frames, fps and ETA of a render);
+        it is kept until a later update replaces it.
+        """
+        with self.lock:
+            task = self.running.get(task_id)
+            if task is None:
+                return
+            status_changed = task["status"] != status
+            task.update(status=status, progress=progress, message=message, updated_at=time.time())
+            if details is not None:
+                task["details"] = details
+
+            if status in FINISHED_STATUSES:
+                del self.running[task_id]
+                self._write(task)
+                del self.last_flush[task_id]
+                self._evict()
+            elif status_changed or task["updated_at"] - self.last_flush.get(task_id, 0) >= self.flush_interval:
+                self._write(task)
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        """State of a task (primary key lookup for finished ones)"""
+        with self.lock:
+            task = self.running.get(task_id)
+            if task is not None:
+                return dict(task)
+            row = self.conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def history(self, platform: str = None, account: str = None, status: str = None, limit: int = 100) -> List[Dict]:
+        """Most recently updated tasks, optionally filtered by account and status"""
+        conditions, params = [], []
+        if platform:
+            conditions.append("platform = ?")
+            params.append(platform)
+        if account:
+            conditions.append("account = ?")
+            params.append(account)
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.lock:
+            # Running tasks may have unflushed progress: the in-memory state wins
+            rows = self.conn.execute(
+                f"SELECT * FROM tasks {where} ORDER BY updated_at DESC LIMIT ?", params + [limit]
+            ).fetchall()
+            return [dict(self.running[row["task_id"]]) if row["task_id"] in self.running else self._from_row(row)
+                    for row in rows]
+
+    @staticmethod
+    def _from_row(row):
+        task = dict(row)
+        task["details"] = json.loads(task["details"]) if task["details"] else None
+        return task
+
+    def _write(self, task):
+        """Upsert a task (called with self.lock held)"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tasks (task_id, type, platform, account, status, progress, message, "
+                "details, created_at, updated_at) VALUES (:task_id, :type, :platform, :account, :status, "
+                ":progress, :message, :details, :created_at, :updated_at)",
+                dict(task, details=json.dumps(task["details"]) if task["details"] else None)
+            )
+        self.last_flush[task["task_id"]] = task["updated_at"]
+        if self.on_change:
+            self.on_change(dict(task))
+
+    def _evict(self):
+        """Drop expired finished tasks and keep only the newest max_finished (called with self.lock held)"""
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM tasks WHERE status IN (?, ?) AND updated_at < ?",
+                FINISHED_STATUSES + (time.time() - self.ttl_seconds,)
+            )
+            self.conn.execute(
+                "DELETE FROM tasks WHERE task_id IN (SELECT task_id FROM tasks WHERE status IN (?, ?) "
+                "ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                FINISHED_STATUSES + (self.max_finished,)
+            )
+
+    def close(self):
+        with self.lock:
+            for task in self.running.values():
+                self._write(task)
+            self.conn.close()
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import uuid
+
+from fastapi import HTTPException
+from multipart.multipart import MultipartParser, parse_options_header
+
+# Room for the boundaries, part headers and form fields around the file in the request body
+FORM_OVERHEAD = 64 * 1024
+# Largest plain form field accepted (the file part has its own limit)
+MAX_FIELD_SIZE = 64 * 1024
+
+
+class UploadReceiver:
+    """
+    Streaming reader of a multipart/form-data upload with a single file part
+
+    The request body is fed to python-multipart's parser as it arrives and the
+    bytes of the file part are written straight to a .part file in upload_dir
+    (hashed on the way), so the upload is never spooled to a temporary file first
+    and the size limit is enforced while receiving, not after. The other parts
+    are collected as form fields.
+
+    Files are stored under a name unique to the request, so concurrent uploads of
+    files with the same name never share a file; the client's file name is only
+    kept in `filename`.
+    """
+
+    def __init__(self, upload_dir, max_size=None):
+        self.upload_dir = upload_dir
+        self.max_size = max_size
+        self.fields = {}
+        self.upload_path = None
+        self.filename = None  # Name of the file on the client (base name only)
+        self.digest = hashlib.sha256()
+        self.received = 0
+        self._file = None
+        self._field = ("", b"")  # (name, bytes) of the form field being read
+        self._events = []
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = {}
+
+    async def receive(self, request):
+        """
+        Read the whole request body
+        Returns:
+            str: Path of the received file (a unique name in upload_dir)
+        Raises:
+            HTTPException: 413 if the body or the file is too large, 400 if it isn't a
+                multipart form with a file
+        """
+        content_length = request.headers.get("content-length")
+        if self.max_size and content_length and content_length.isdigit() \
+                and int(content_length) > self.max_size + FORM_OVERHEAD:
+            raise HTTPException(status_code=413, detail=self._too_large())
+
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+        parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                self._process_events()
+            parser.finalize()
+            self._process_events()
+        except BaseException:
+            self._discard()
+            raise
+
+        if not self.upload_path:
+            self._discard()
+            raise HTTPException(status_code=400, detail="No file in the upload")
+        os.replace(self.upload_path + ".part", self.upload_path)
+        return self.upload_path
+
+    def sha256(self):
+        return self.digest.hexdigest()
+
+    # Parser callbacks only record what happened; _process_events acts on it after each write
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        self._events.append(("headers", self._headers))
+
+    def _on_part_data(self, data, start, end):
+        self._events.append(("data", data[start:end]))
+
+    def _on_part_end(self):
+        self._events.append(("end", None))
+
+    def _process_events(self):
+        events, self._events = self._events, []
+        for kind, value in events:
+            if kind == "headers":
+                self._start_part(value)
+            elif kind == "data":
+                self._write(value)
+            elif self._file:
+                self._file.close()
+                self._file = None
+            else:
+                name, data = self._field
+                self.fields[name] = data.decode("utf-8", errors="replace")
+
+    def _start_part(self, headers):
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        filename = options.get(b"filename")
+        if filename is None:
+            self._field = (name, b"")
+            return
+        if self.upload_path:
+            raise HTTPException(status_code=400, detail="Only one file can be uploaded")
+        filename = os.path.basename(filename.decode("utf-8", errors="replace").replace("\\", "/"))
+        if not filename:
+            raise HTTPException(status_code=400, detail="The uploaded file has no name")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self.filename = filename
+        self.upload_path = os.path.join(self.upload_dir, uuid.uuid4().hex + os.path.splitext(filename)[1])
+        self._file = open(self.upload_path + ".part", "wb")
+
+    def _write(self, data):
+        if self._file:
+            self.received += len(data)
+            if self.max_size and self.received > self.max_size:
+                raise HTTPException(status_code=413, detail=self._too_large())
+            self.digest.update(data)
+            self._file.write(data)
+        else:
+            name, value = self._field
+            if len(value) + len(data) > MAX_FIELD_SIZE:
+                raise HTTPException(status_code=413, detail=f"Form field {name} is too large")
+            self._field = (name, value + data)
+
+    def _discard(self):
+        """Drop the partial file of a rejected or interrupted upload"""
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self.upload_path and os.path.exists(self.upload_path + ".part"):
+            os.remove(self.upload_path + ".part")
+
+    def _too_large(self):
+        return f"File exceeds the maximum size of {self.max_size // (1024 * 1024)} MB"
@@ -1,5 +1,6 @@
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useRef, useCallback } from 'react';
 import { api } from '../services/api';
+import { useAuth } from './AuthContext';
 
 const ApiContext = createContext();
 
@@ -11,6 +12,60 @@ export function ApiProvider({ children }) {
   const [platforms, setPlatforms] = useState([]);
   const [config, setConfig] = useState({});
   const [loading, setLoading] = useState(false);
+  const eventListeners = useRef({});
+  const { isAuthenticated } = useAuth();
+
+  // One server-sent event stream per app: task progress, scheduler state and upload results
+  // are pushed to the subscribers instead of being polled
+  useEffect(() => {
+    if (!isAuthenticated) return undefined;
+
+    let source = null;
+    let retryTimer = null;
+    let closed = false;
+
+    const reconnect = () => {
+      if (!closed) retryTimer = setTimeout(connect, 3000);
+    };
+
+    const connect = async () => {
+      try {
+        const url = await api.eventsUrl();
+        if (closed) return;
+        source = new EventSource(url);
+      } catch (error) {
+        console.error('Error opening event stream:', error);
+        reconnect();
+        return;
+      }
+      ['task', 'scheduler', 'upload'].forEach(eventType => {
+        source.addEventListener(eventType, (event) => {
+          const data = JSON.parse(event.data);
+          (eventListeners.current[eventType] || []).forEach(handler => handler(data));
+        });
+      });
+      source.onerror = () => {
+        // The ticket was used up: reconnect with a new one instead of letting EventSource retry
+        console.warn('Event stream disconnected, reconnecting...');
+        source.close();
+        reconnect();
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, [isAuthenticated]);
+
+  const subscribe = useCallback((eventType, handler) => {
+    eventListeners.current[eventType] = [...(eventListeners.current[eventType] || []), handler];
+    return () => {
+      eventListeners.current[eventType] = (eventListeners.current[eventType] || []).filter(h => h !== handler);
+    };
+  }, []);
 
   const loadPlatforms = async () => {
     try {
@@ -156,6 +211,36 @@ export function ApiProvider({ children }) {
     }
   };
 
+  const getUploadQueue = async (platformName, accountName) => {
+    try {
+      const response = await api.get(`/platforms/${platformName}/accounts/${accountName}/upload-queue`);
+      return response.data;
+    } catch (error) {
+      console.error('Error getting upload queue:', error);
+      throw error;
+    }
+  };
+
+  const requeueClip = async (platformName, accountName, clipNumber) => {
+    try {
+      const response = await api.post(`/platforms/${platformName}/accounts/${accountName}/upload-queue/${clipNumber}/requeue`);
+      return response.data;
+    } catch (error) {
+      console.error('Error requeueing clip:', error);
+      throw error;
+    }
+  };
+
+  const getTaskHistory = async (filters = {}) => {
+    try {
+      const response = await api.get('/tasks', { params: filters });
+      return response.data;
+    } catch (error) {
+      console.error('Error getting task history:', error);
+      throw error;
+    }
+  };
+
   const getDashboardStats = async () => {
     try {
       const response = await api.get('/dashboard/stats');
@@ -371,8 +456,13 @@ export function ApiProvider({ children }) {
     generateClipsFromUrl,
     generateClipsFromFile,
     uploadContent,
+    getUploadQueue,
+    requeueClip,
     getTaskStatus,
+    getTaskHistory,
     getDashboardStats,
+    // Server-sent events
+    subscribe,
     // Scheduler functions
     getSchedulerStatus,
     getNextUploadTimes,
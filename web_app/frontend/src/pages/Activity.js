@@ -20,7 +20,24 @@ import {
   ChevronDown
 } from 'lucide-react';
 
+// Background tasks (clip generation and uploads) as shown in the activity list
+const taskStatusMap = { completed: 'success', failed: 'error', processing: 'processing' };
+
+const taskToActivity = (task) => ({
+  id: task.task_id,
+  timestamp: new Date(task.updated_at * 1000).toISOString(),
+  type: task.type,
+  action: task.type === 'upload' ? 'Content upload' : 'Content generation',
+  description: task.message,
+  platform: task.platform,
+  account: task.account,
+  status: taskStatusMap[task.status] || task.status,
+  duration: task.status === 'processing' ? null : Math.round(task.updated_at - task.created_at),
+  details: { progress: `${task.progress}%` }
+});
+
 function Activity() {
+  const { getTaskHistory, subscribe } = useApi();
   const [activities, setActivities] = useState([]);
   const [filteredActivities, setFilteredActivities] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -33,15 +50,12 @@ function Activity() {
   useEffect(() => {
     loadActivities();
     
-    // Auto-refresh every 10 seconds if enabled
-    let interval;
-    if (autoRefresh) {
-      interval = setInterval(loadActivities, 10000);
-    }
-    
-    return () => {
-      if (interval) clearInterval(interval);
-    };
+    // Live updates: task changes are pushed by the server while auto-refresh is enabled
+    if (!autoRefresh) return undefined;
+    return subscribe('task', (task) => {
+      const activity = taskToActivity(task);
+      setActivities(prev => [activity, ...prev.filter(existing => existing.id !== activity.id)].slice(0, 200));
+    });
   }, [autoRefresh]);
 
   useEffect(() => {
@@ -52,107 +66,11 @@ function Activity() {
     try {
       setLoading(true);
       
-      // Simulate activity data (in a real app, this would come from your backend)
-      const mockActivities = [
-        {
-          id: 1,
-          timestamp: new Date().toISOString(),
-          type: 'upload',
-          action: 'Video uploaded successfully',
-          description: 'Gaming highlights clip uploaded to YouTube',
-          platform: 'YouTube',
-          account: 'Gaming Channel',
-          status: 'success',
-          duration: 45,
-          details: { videoId: 'abc123', views: 0, size: '25MB' }
-        },
-        {
-          id: 2,
-          timestamp: new Date(Date.now() - 300000).toISOString(),
-          type: 'generation',
-          action: 'Content generation completed',
-          description: 'Generated 5 clips from URL',
-          platform: 'TikTok',
-          account: 'Dance Account',
-          status: 'success',
-          duration: 180,
-          details: { clipsGenerated: 5, sourceUrl: 'youtube.com/watch?v=example' }
-        },
-        {
-          id: 3,
-          timestamp: new Date(Date.now() - 600000).toISOString(),
-          type: 'upload',
-          action: 'Upload failed - authentication error',
-          description: 'Failed to authenticate with Instagram API',
-          platform: 'Instagram',
-          account: 'Photo Account',
-          status: 'error',
-          duration: 12,
-          details: { error: 'Token expired', errorCode: 401 }
-        },
-        {
-          id: 4,
-          timestamp: new Date(Date.now() - 900000).toISOString(),
-          type: 'schedule',
-          action: 'Scheduled upload triggered',
-          description: 'Automatic upload started per schedule',
-          platform: 'TikTok',
-          account: 'Entertainment',
-          status: 'processing',
-          duration: null,
-          details: { scheduledTime: '14:00', nextUpload: '16:00' }
-        },
-        {
-          id: 5,
-          timestamp: new Date(Date.now() - 1200000).toISOString(),
-          type: 'account',
-          action: 'Account authenticated',
-          description: 'Successfully authenticated YouTube account',
-          platform: 'YouTube',
-          account: 'Tech Reviews',
-          status: 'success',
-          duration: 8,
-          details: { method: 'OAuth2', scopes: ['youtube.upload'] }
-        },
-        {
-          id: 6,
-          timestamp: new Date(Date.now() - 1800000).toISOString(),
-          type: 'generation',
-          action: 'File processing started',
-          description: 'Processing uploaded video file for clip generation',
-          platform: 'YouTube',
-          account: 'Music Channel',
-          status: 'processing',
-          duration: null,
-          details: { fileName: 'concert_recording.mp4', fileSize: '1.2GB' }
-        },
-        {
-          id: 7,
-          timestamp: new Date(Date.now() - 2400000).toISOString(),
-          type: 'system',
-          action: 'Platform scheduler started',
-          description: 'Auto-upload scheduler enabled for YouTube',
-          platform: 'YouTube',
-          account: 'System',
-          status: 'success',
-          duration: 2,
-          details: { activeAccounts: 4, nextCheck: '15 minutes' }
-        },
-        {
-          id: 8,
-          timestamp: new Date(Date.now() - 3600000).toISOString(),
-          type: 'upload',
-          action: 'Batch upload completed',
-          description: 'Successfully uploaded 3 videos across platforms',
-          platform: 'Multiple',
-          account: 'Batch Job',
-          status: 'success',
-          duration: 320,
-          details: { platforms: ['YouTube', 'TikTok', 'Twitter'], totalUploads: 3 }
-        }
-      ];
+      // Background tasks (clip generation and uploads) recorded by the backend
+      const tasks = await getTaskHistory({ limit: 200 });
+      const taskActivities = tasks.map(taskToActivity);
       
-      setActivities(mockActivities);
+      setActivities(taskActivities);
     } catch (error) {
       console.error('Error loading activities:', error);
     } finally {
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useApi } from '../contexts/ApiContext';
 import { toast } from 'react-hot-toast';
@@ -35,9 +35,12 @@ function PlatformDetail() {
     generateClipsFromUrl,
     generateClipsFromFile,
     uploadContent,
+    getUploadQueue,
+    requeueClip,
     getTaskStatus,
     getSchedulerStatus,
-    getNextUploadTimes
+    getNextUploadTimes,
+    subscribe
   } = useApi();
 
   const [accounts, setAccounts] = useState([]);
@@ -52,7 +55,9 @@ function PlatformDetail() {
   const [newTimeInputs, setNewTimeInputs] = useState({});
   const [schedulerStatus, setSchedulerStatus] = useState(null);
   const [nextUploads, setNextUploads] = useState({});
+  const [heldClips, setHeldClips] = useState({});
   const [currentTime, setCurrentTime] = useState(new Date());
+  const trackedTasks = useRef(new Set());
 
   // Form states
   const [accountForm, setAccountForm] = useState({
@@ -91,13 +96,22 @@ function PlatformDetail() {
     loadAccounts();
     loadSchedulerInfo();
 
-    // Set up auto-refresh for scheduler info every 60 seconds
-    const schedulerRefreshInterval = setInterval(() => {
-      loadSchedulerInfo();
-    }, 60000); // 60 seconds
+    // Scheduler state and task progress are pushed by the server
+    const unsubscribeScheduler = subscribe('scheduler', (data) => {
+      if (data.platform_name !== platformName) return;
+      setSchedulerStatus(data.status);
+      setNextUploads(data.next_uploads);
+    });
+    const unsubscribeTasks = subscribe('task', handleTaskUpdate);
+    // An upload may leave a clip held (interrupted) in the account's queue
+    const unsubscribeUploads = subscribe('upload', (data) => {
+      if (data.platform === platformName) loadHeldClips(data.account);
+    });
 
     return () => {
-      clearInterval(schedulerRefreshInterval);
+      unsubscribeScheduler();
+      unsubscribeTasks();
+      unsubscribeUploads();
     };
   }, [platformName]);
 
@@ -118,6 +132,7 @@ function PlatformDetail() {
       const data = await getAccounts(platformName);
       console.log('Loaded accounts data:', data); // Debug log
       setAccounts(data);
+      data.forEach((account) => loadHeldClips(account.name));
     } catch (error) {
       console.error('Error loading accounts:', error); // Debug log
       toast.error('Failed to load accounts');
@@ -126,6 +141,25 @@ function PlatformDetail() {
     }
   };
 
+  const loadHeldClips = async (accountName) => {
+    try {
+      const queue = await getUploadQueue(platformName, accountName);
+      setHeldClips(prev => ({ ...prev, [accountName]: queue.held }));
+    } catch (error) {
+      // Platforms without uploads have no queue
+    }
+  };
+
+  const handleRequeueClip = async (accountName, clipNumber) => {
+    try {
+      await requeueClip(platformName, accountName, clipNumber);
+      toast.success(`clip_${clipNumber}.mp4 queued again`);
+      loadHeldClips(accountName);
+    } catch (error) {
+      toast.error('Failed to requeue clip');
+    }
+  };
+
   const loadSchedulerInfo = async () => {
     try {
       const [statusData, uploadsData] = await Promise.all([
@@ -265,8 +299,8 @@ function PlatformDetail() {
       setShowContentGenerator(false);
       setContentForm({ url: '', file: null, type: 'url', mobileFormat: true });
       
-      // Poll for task status
-      pollTaskStatus(taskId);
+      // Follow the task through the event stream
+      trackTask(taskId);
     } catch (error) {
       toast.error('Failed to start content generation');
       setIsGeneratingClips(false);
@@ -281,44 +315,47 @@ function PlatformDetail() {
       
       toast.success('Content upload started!');
       
-      // Poll for task status
-      pollTaskStatus(taskId);
+      // Follow the task through the event stream
+      trackTask(taskId);
     } catch (error) {
       toast.error('Failed to start content upload');
     }
   };
 
-  const pollTaskStatus = async (taskId) => {
-    const pollInterval = setInterval(async () => {
-      try {
-        const status = await getTaskStatus(taskId);
-        setActiveTasks(prev => ({ ...prev, [taskId]: status }));
-        
-        if (status.status === 'completed') {
-          toast.success(status.message || 'Clips generated successfully!');
-          clearInterval(pollInterval);
-          setActiveTasks(prev => {
-            const newTasks = { ...prev };
-            delete newTasks[taskId];
-            return newTasks;
-          });
-          setIsGeneratingClips(false);
-          // Refresh accounts to update clips count
-          loadAccounts();
-        } else if (status.status === 'failed') {
-          toast.error(status.message || 'Task failed');
-          clearInterval(pollInterval);
-          setActiveTasks(prev => {
-            const newTasks = { ...prev };
-            delete newTasks[taskId];
-            return newTasks;
-          });
-          setIsGeneratingClips(false);
-        }
-      } catch (error) {
-        clearInterval(pollInterval);
-      }
-    }, 2000);
+  const handleTaskUpdate = (status) => {
+    const taskId = status.task_id;
+    if (!trackedTasks.current.has(taskId)) return;
+
+    if (status.status === 'processing') {
+      setActiveTasks(prev => ({ ...prev, [taskId]: status }));
+      return;
+    }
+
+    trackedTasks.current.delete(taskId);
+    setActiveTasks(prev => {
+      const newTasks = { ...prev };
+      delete newTasks[taskId];
+      return newTasks;
+    });
+    setIsGeneratingClips(false);
+
+    if (status.status === 'completed') {
+      toast.success(status.message || 'Clips generated successfully!');
+      // Refresh accounts to update clips count
+      loadAccounts();
+    } else if (status.status === 'failed') {
+      toast.error(status.message || 'Task failed');
+    }
+  };
+
+  const trackTask = async (taskId) => {
+    trackedTasks.current.add(taskId);
+    // Catch up on anything the task reported before it was tracked; the rest arrives as events
+    try {
+      handleTaskUpdate(await getTaskStatus(taskId));
+    } catch (error) {
+      console.error('Error getting task status:', error);
+    }
   };
 
   const openAccountEditor = (account) => {
@@ -662,6 +699,29 @@ function PlatformDetail() {
                 {account.description && (
                   <p className="mt-2 text-sm text-gray-600">{account.description}</p>
                 )}
+
+                {/* Clips held after an interrupted upload: check the channel before requeueing */}
+                {heldClips[account.name] && heldClips[account.name].length > 0 && (
+                  <div className="mt-3 p-3 bg-yellow-50 border border-yellow-200 rounded-lg text-sm">
+                    <div className="flex items-center text-yellow-800 mb-2">
+                      <AlertCircle className="h-4 w-4 mr-1" />
+                      Uploads interrupted: these clips may or may not have been published. Check the account, then requeue the ones that are missing.
+                    </div>
+                    <div className="flex flex-wrap gap-2">
+                      {heldClips[account.name].map((clip) => (
+                        <button
+                          key={clip.clip_number}
+                          onClick={() => handleRequeueClip(account.name, clip.clip_number)}
+                          title={clip.error || ''}
+                          className="flex items-center px-2 py-1 bg-yellow-100 text-yellow-800 rounded-lg hover:bg-yellow-200 transition-colors text-xs"
+                        >
+                          <RefreshCw className="h-3 w-3 mr-1" />
+                          Requeue clip_{clip.clip_number}.mp4
+                        </button>
+                      ))}
+                    </div>
+                  </div>
+                )}
               </div>
             ))}
           </div>
@@ -84,6 +84,7 @@ function Settings() {
     performance: {
       uploadBandwidth: 10, // Mbps
       downloadBandwidth: 50, // Mbps
+      uploadChunkSize: 8, // MB
       maxFileSize: 1024, // MB
       compressionQuality: 85,
       parallelProcessing: true,
@@ -732,6 +733,18 @@ function Settings() {
               className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
             />
           </div>
+
+          <div>
+            <label className="block text-sm font-medium text-gray-700 mb-1">Upload Chunk Size (MB)</label>
+            <input
+              type="number"
+              min="1"
+              max="256"
+              value={settings.performance.uploadChunkSize}
+              onChange={(e) => handleInputChange('performance', 'uploadChunkSize', parseInt(e.target.value))}
+              className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
+            />
+          </div>
         </div>
       </SettingSection>
 
@@ -47,8 +47,15 @@ class ApiService {
     }
   }
 
-  async get(endpoint) {
-    return this.client.get(endpoint);
+  async get(endpoint, config = {}) {
+    return this.client.get(endpoint, config);
+  }
+
+  // URL of the server-sent event stream. EventSource can't send headers, so it is opened with a
+  // short-lived single-use ticket (fetch a new URL for every connection)
+  async eventsUrl() {
+    const response = await this.client.post('/events/ticket');
+    return `${API_BASE_URL}/events?ticket=${encodeURIComponent(response.data.ticket)}`;
   }
 
   async post(endpoint, data, config = {}) {